@@ -1,35 +1,219 @@
 import numpy as np
-from scipy.signal import convolve2d
-
-def simulate_em_coherence_ripple(S_field, c_dt_dx=1.0, steps=50):
-    """Simulates a coherence ripple propagation, analogous to an EM wave."""
-    S = np.array(S_field)
-    
-    # 2D Finite Difference Laplacian (approximates EM wave propagation)
-    laplacian_kernel = np.array([[0, 1, 0], [1, -4, 1], [0, 1, 0]])
-    
-    ripple_history = []
-    
+import scipy.fft as sfft
+
+
+def periodic_laplacian(S, out, axes=None):
+    """
+    Nearest-neighbour Laplacian (5-point in 2D, 7-point in 3D) with wrap-around boundaries, written into `out`.
+
+    :param axes: Grid axes to differentiate along (default: all); the others are batch axes.
+    """
+    axes = range(S.ndim) if axes is None else axes
+    np.multiply(S, -2 * len(axes), out=out)
+    for axis in axes:
+        lead = (slice(None),) * axis
+        out[lead + (slice(1, None),)] += S[lead + (slice(None, -1),)]
+        out[lead + (slice(None, 1),)] += S[lead + (slice(-1, None),)]
+        out[lead + (slice(None, -1),)] += S[lead + (slice(1, None),)]
+        out[lead + (slice(-1, None),)] += S[lead + (slice(None, 1),)]
+    return out
+
+
+def spectral_laplacian_operator(shape, dx=1.0):
+    """Returns laplacian(S, out) applying -|k|^2 in Fourier space on a periodic grid."""
+    k_axes = [2 * np.pi * sfft.fftfreq(n, d=dx) for n in shape[:-1]]
+    k_axes.append(2 * np.pi * sfft.rfftfreq(shape[-1], d=dx))
+    minus_k2 = -sum(k ** 2 for k in np.meshgrid(*k_axes, indexing='ij', sparse=True))
+
+    def laplacian(S, out):
+        S_k = sfft.rfftn(S, workers=-1)
+        S_k *= minus_k2
+        out[...] = sfft.irfftn(S_k, s=S.shape, workers=-1)
+        return out
+
+    return laplacian
+
+
+def cfl_limit(ndim, laplacian='fd'):
+    """Largest stable Courant number c*dt/dx of the leapfrog scheme."""
+    if laplacian == 'fd':
+        return 1 / np.sqrt(ndim)
+    if laplacian == 'spectral':
+        return 2 / (np.pi * np.sqrt(ndim))
+    raise ValueError("laplacian must be 'fd' or 'spectral'.")
+
+
+def simulate_em_coherence_ripple(S_field, c_dt_dx=1.0, steps=50, record_every=1, frame_sink=None):
+    """
+    Simulates a coherence ripple propagation, analogous to an EM wave.
+
+    Two preallocated grids are updated in place and swapped each step, and a
+    frame is kept every `record_every` steps, so memory is O(grid) plus the
+    steps // record_every recorded frames. With a `frame_sink` (anything with
+    append(frame), e.g. frame_store.FrameStoreWriter) frames are streamed
+    there instead and the returned history is empty.
+    """
+    S = np.array(S_field, dtype=np.result_type(np.asarray(S_field).dtype, np.float32))
+    S_new = np.empty_like(S)
+    c2 = c_dt_dx ** 2
+
+    n_frames = steps // record_every if record_every and frame_sink is None else 0
+    ripple_history = np.empty((n_frames,) + S.shape, dtype=S.dtype)
+
     for t in range(steps):
         # The change in S is proportional to the Laplacian (wave equation)
         # S(t+1) = 2*S(t) - S(t-1) + (c*dt/dx)^2 * Laplacian(S(t))
         # We simplify to focus on the change driven by S gradient (curvature/coherence)
-        S_laplace = convolve2d(S, laplacian_kernel, mode='same', boundary='wrap')
-        
-        # New S state driven by the coherence gradient
-        S_new = S + (c_dt_dx**2) * S_laplace
-        
+        periodic_laplacian(S, S_new)
+
+        # New S state driven by the coherence gradient: S + c^2 * Laplacian(S)
+        S_new *= c2
+        S_new += S
+
         # Apply FQC-like damping/amplification (e.g., FCU resonance)
         S_new *= (1 + 0.01 * np.sin(np.pi * t / 10)) # Simple periodic modulation
-        
-        ripple_history.append(S_new)
-        S = S_new
-        
-    return np.array(ripple_history)
-
-# Example usage
-initial_S = np.zeros((20, 20))
-initial_S[10, 10] = 5.0 # Initial localized charge disturbance (high coherence/charge)
-ripple_frames = simulate_em_coherence_ripple(initial_S)
-print("Simulated Coherence Ripple Frames:", ripple_frames.shape)
 
+        S, S_new = S_new, S
+        if record_every and (t + 1) % record_every == 0:
+            if frame_sink is not None:
+                frame_sink.append(S)
+            else:
+                ripple_history[(t + 1) // record_every - 1] = S
+
+    return ripple_history
+
+
+def simulate_em_wave(S_field, c=1.0, dx=1.0, dt=None, steps=50, laplacian='fd', cfl=0.9,
+                     S_velocity=None, record_every=1, frame_sink=None):
+    """
+    Leapfrog integration of the full wave equation S(t+1) = 2 S(t) - S(t-1) + (c dt)^2 Laplacian(S(t)).
+
+    Works on 1D, 2D or 3D periodic grids. If `dt` is None it is set to `cfl` times
+    the stability limit of the chosen Laplacian; a larger `dt` is rejected.
+    The FCU modulation of simulate_em_coherence_ripple is kept as a rate,
+    (1 + 0.01 sin(pi t / 10))**dt per step, so it matches the ripple at dt = 1.
+
+    :param laplacian: 'fd' (nearest-neighbour stencil) or 'spectral' (FFT, periodic).
+    :param S_velocity: Initial dS/dt (defaults to a field at rest).
+    :param frame_sink: Optional append(frame) target; frames then go there, not into memory.
+    :return: (frames (steps // record_every, *grid), dt)
+    """
+    S = np.array(S_field, dtype=np.result_type(np.asarray(S_field).dtype, np.float32))
+    limit = cfl_limit(S.ndim, laplacian) * dx / c
+    if dt is None:
+        dt = cfl * limit
+    elif dt > limit:
+        raise ValueError(f"dt = {dt:g} violates the CFL limit {limit:g} for the {laplacian} Laplacian.")
+    apply_laplacian = periodic_laplacian if laplacian == 'fd' else spectral_laplacian_operator(S.shape, dx)
+    courant2 = (c * dt) ** 2 if laplacian == 'spectral' else (c * dt / dx) ** 2
+
+    # Taylor start: S(-dt) = S(0) - dt v(0) + (c dt)^2 / 2 Laplacian(S(0))
+    S_new = np.empty_like(S)
+    S_prev = apply_laplacian(S, np.empty_like(S))
+    S_prev *= 0.5 * courant2
+    S_prev += S
+    if S_velocity is not None:
+        S_prev -= dt * np.asarray(S_velocity)
+
+    n_frames = steps // record_every if record_every and frame_sink is None else 0
+    ripple_history = np.empty((n_frames,) + S.shape, dtype=S.dtype)
+
+    for n in range(steps):
+        apply_laplacian(S, S_new)
+        S_new *= courant2
+        S_new += S
+        S_new += S
+        S_new -= S_prev
+
+        # FCU resonance modulation, integrated over the step
+        S_new *= (1 + 0.01 * np.sin(np.pi * n * dt / 10)) ** dt
+
+        S_prev, S, S_new = S, S_new, S_prev
+        if record_every and (n + 1) % record_every == 0:
+            if frame_sink is not None:
+                frame_sink.append(S)
+            else:
+                ripple_history[(n + 1) // record_every - 1] = S
+
+    return ripple_history, dt
+
+
+def _ripple_observables(S, source, axes):
+    """Energy (sum S^2), peak position/value and RMS spread about the source, per batch member."""
+    density = S ** 2
+    energy = density.sum(axis=axes)
+    flat = np.abs(S).reshape(S.shape[0], -1)
+    peak = flat.argmax(axis=1)
+    peak_position = np.stack(np.unravel_index(peak, S.shape[1:]), axis=-1)
+    spread2 = np.zeros(S.shape[0])
+    for k, axis in enumerate(axes):
+        n = S.shape[axis]
+        marginal = density.sum(axis=tuple(a for a in axes if a != axis))
+        # Minimum-image distance to the member's source along this axis
+        d = (np.arange(n)[None, :] - source[:, k:k + 1] + n // 2) % n - n // 2
+        spread2 += (marginal * d ** 2).sum(axis=1)
+    return energy, peak_position, flat[np.arange(S.shape[0]), peak], np.sqrt(spread2 / np.maximum(energy, 1e-300))
+
+
+def simulate_em_ripple_ensemble(S_fields, c_dt_dx=1.0, steps=50, modulation=0.01, modulation_rate=np.pi / 10,
+                                observe_every=1):
+    """
+    Advances a (B, *grid) stack of initial fields with one batched ripple update.
+
+    Each member follows simulate_em_coherence_ripple with its own c_dt_dx and
+    FCU modulation S *= 1 + modulation * sin(modulation_rate * t); all three
+    accept a scalar or a (B,) array. Instead of frames, reduced observables are
+    returned every `observe_every` steps.
+
+    :return: {"steps": (T,), "energy": (T, B), "peak_position": (T, B, ndim), "peak_value": (T, B),
+              "spread": (T, B), "final": (B, *grid)}
+    """
+    S = np.array(S_fields, dtype=np.result_type(np.asarray(S_fields).dtype, np.float32))
+    n_batch, grid_axes = S.shape[0], tuple(range(1, S.ndim))
+    batch_shape = (n_batch,) + (1,) * len(grid_axes)
+    c2 = (np.broadcast_to(np.asarray(c_dt_dx, dtype=float), (n_batch,)) ** 2).reshape(batch_shape)
+    modulation = np.broadcast_to(np.asarray(modulation, dtype=float), (n_batch,))
+    modulation_rate = np.broadcast_to(np.asarray(modulation_rate, dtype=float), (n_batch,))
+    factor = np.empty(batch_shape)
+    S_new = np.empty_like(S)
+
+    # Spread is measured about each member's initial disturbance
+    source = np.stack(np.unravel_index(np.abs(S).reshape(n_batch, -1).argmax(axis=1), S.shape[1:]), axis=-1)
+    n_obs = steps // observe_every
+    records = {'steps': np.arange(1, n_obs + 1) * observe_every, 'energy': np.empty((n_obs, n_batch)),
+               'peak_position': np.empty((n_obs, n_batch, len(grid_axes)), dtype=np.int64),
+               'peak_value': np.empty((n_obs, n_batch)), 'spread': np.empty((n_obs, n_batch))}
+
+    for t in range(steps):
+        periodic_laplacian(S, S_new, axes=grid_axes)
+        S_new *= c2
+        S_new += S
+        factor.reshape(-1)[:] = 1 + modulation * np.sin(modulation_rate * t)
+        S_new *= factor
+
+        S, S_new = S_new, S
+        if (t + 1) % observe_every == 0:
+            row = (t + 1) // observe_every - 1
+            (records['energy'][row], records['peak_position'][row],
+             records['peak_value'][row], records['spread'][row]) = _ripple_observables(S, source, grid_axes)
+
+    records['final'] = S
+    return records
+
+
+if __name__ == "__main__":
+    # Example usage
+    initial_S = np.zeros((20, 20))
+    initial_S[10, 10] = 5.0 # Initial localized charge disturbance (high coherence/charge)
+    ripple_frames = simulate_em_coherence_ripple(initial_S)
+    print("Simulated Coherence Ripple Frames:", ripple_frames.shape)
+
+    wave_frames, dt = simulate_em_wave(initial_S, steps=50, laplacian='spectral')
+    print(f"Leapfrog (spectral) Frames: {wave_frames.shape}, CFL-stable dt = {dt:.3f}")
+
+    # Ensemble: 1000 disturbance locations and amplitudes in one batched run
+    rng = np.random.default_rng(0)
+    ensemble_S = np.zeros((1000, 20, 20))
+    ensemble_S[np.arange(1000), rng.integers(0, 20, 1000), rng.integers(0, 20, 1000)] = rng.uniform(1, 5, 1000)
+    ensemble = simulate_em_ripple_ensemble(ensemble_S, c_dt_dx=0.3, steps=50, observe_every=10)
+    print("Ensemble Spread at t=50:", ensemble['spread'][-1].mean())
@@ -0,0 +1,206 @@
+"""
+Chunked, compressed on-disk frame store for ripple histories.
+
+A store is a directory of chunk files holding `chunk_frames` consecutive
+frames each, plus a small index.json (frame shape, dtype, codec and one entry
+per chunk). The writer buffers one chunk in memory and rewrites the index
+atomically after every chunk, so an interrupted run leaves a readable store.
+The reader decodes only the chunks a frame or time slice touches:
+    * codec 'zlib' - byte-shuffled, zlib-compressed chunks
+    * codec None   - raw .npy chunks, memory-mapped on access
+
+    with FrameStoreWriter('ripple.frames', initial_S.shape) as store:
+        simulate_em_coherence_ripple(initial_S, steps=100000, record_every=10, frame_sink=store)
+    frames = FrameStore('ripple.frames')[1000:2000:10]
+"""
+import json
+import os
+import zlib
+from collections import OrderedDict
+import numpy as np
+
+INDEX_NAME = 'index.json'
+FORMAT_VERSION = 1
+
+
+def _shuffle(chunk):
+    """Groups the k-th byte of every element together (compresses smooth floats much better)."""
+    return np.ascontiguousarray(chunk.reshape(-1).view(np.uint8).reshape(-1, chunk.dtype.itemsize).T).tobytes()
+
+
+def _unshuffle(data, dtype, shape):
+    itemsize = np.dtype(dtype).itemsize
+    raw = np.frombuffer(data, dtype=np.uint8).reshape(itemsize, -1).T
+    return np.ascontiguousarray(raw).view(dtype).reshape(shape)
+
+
+# --- 1. Writer ---
+class FrameStoreWriter:
+    """Streams frames into a store; use as a context manager or call close()."""
+
+    def __init__(self, path, frame_shape, dtype=np.float64, chunk_frames=64, codec='zlib', level=1, attrs=None):
+        if codec not in ('zlib', None):
+            raise ValueError("codec must be 'zlib' or None.")
+        if os.path.exists(os.path.join(path, INDEX_NAME)):
+            raise FileExistsError(f"A frame store already exists at {path}.")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.frame_shape = tuple(frame_shape)
+        self.dtype = np.dtype(dtype)
+        self.chunk_frames = int(chunk_frames)
+        self.codec = codec
+        self.level = level
+        self.attrs = dict(attrs or {})
+        self.chunks = []
+        self.n_frames = 0
+        self._buffer = np.empty((self.chunk_frames,) + self.frame_shape, dtype=self.dtype)
+        self._fill = 0
+        self._write_index()
+
+    def append(self, frame):
+        self._buffer[self._fill] = frame
+        self._fill += 1
+        self.n_frames += 1
+        if self._fill == self.chunk_frames:
+            self._flush()
+
+    def extend(self, frames):
+        for frame in frames:
+            self.append(frame)
+
+    def _flush(self):
+        if not self._fill:
+            return
+        chunk = self._buffer[:self._fill]
+        if self.codec == 'zlib':
+            name = f'chunk_{len(self.chunks):06d}.zlib'
+            data = zlib.compress(_shuffle(chunk), self.level)
+            with open(os.path.join(self.path, name), 'wb') as f:
+                f.write(data)
+            nbytes = len(data)
+        else:
+            name = f'chunk_{len(self.chunks):06d}.npy'
+            np.save(os.path.join(self.path, name), chunk)
+            nbytes = chunk.nbytes
+        self.chunks.append({'file': name, 'frames': self._fill, 'nbytes': nbytes})
+        self._fill = 0
+        self._write_index()
+
+    def _write_index(self):
+        index = {'version': FORMAT_VERSION, 'frame_shape': list(self.frame_shape), 'dtype': self.dtype.str,
+                 'chunk_frames': self.chunk_frames, 'codec': self.codec, 'n_frames': self.n_frames - self._fill,
+                 'chunks': self.chunks, 'attrs': self.attrs}
+        tmp_path = os.path.join(self.path, f'{INDEX_NAME}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, indent=1)
+        os.replace(tmp_path, os.path.join(self.path, INDEX_NAME))
+
+    def close(self):
+        self._flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- 2. Lazy reader ---
+class FrameStore:
+    """
+    Read-only view of a store, indexable like a (n_frames, *frame_shape) array.
+
+    store[i] and store[start:stop:step] decode only the chunks they touch; the
+    `cache_chunks` most recently decoded chunks are kept in memory.
+    """
+
+    def __init__(self, path, cache_chunks=4):
+        self.path = path
+        with open(os.path.join(path, INDEX_NAME)) as f:
+            index = json.load(f)
+        if index['version'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported frame store version {index['version']}.")
+        self.frame_shape = tuple(index['frame_shape'])
+        self.dtype = np.dtype(index['dtype'])
+        self.codec = index['codec']
+        self.attrs = index['attrs']
+        self.chunks = index['chunks']
+        self.chunk_frames = index['chunk_frames']
+        self.n_frames = sum(chunk['frames'] for chunk in self.chunks)
+        self.cache_chunks = cache_chunks
+        self._cache = OrderedDict()
+
+    @property
+    def shape(self):
+        return (self.n_frames,) + self.frame_shape
+
+    def __len__(self):
+        return self.n_frames
+
+    def chunk(self, k):
+        """Frames of chunk k (a read-only memory map for raw stores)."""
+        if k in self._cache:
+            self._cache.move_to_end(k)
+            return self._cache[k]
+        entry = self.chunks[k]
+        file_path = os.path.join(self.path, entry['file'])
+        if self.codec == 'zlib':
+            with open(file_path, 'rb') as f:
+                data = zlib.decompress(f.read())
+            frames = _unshuffle(data, self.dtype, (entry['frames'],) + self.frame_shape)
+        else:
+            frames = np.load(file_path, mmap_mode='r')
+        self._cache[k] = frames
+        if len(self._cache) > self.cache_chunks:
+            self._cache.popitem(last=False)
+        return frames
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            frames_key, rest = key[0], key[1:]
+            return self[frames_key][(slice(None),) * (not np.isscalar(frames_key)) + rest]
+        if isinstance(key, (int, np.integer)):
+            index = key + self.n_frames if key < 0 else key
+            if not 0 <= index < self.n_frames:
+                raise IndexError(f"Frame {key} out of range for {self.n_frames} frames.")
+            return np.array(self.chunk(index // self.chunk_frames)[index % self.chunk_frames])
+        if isinstance(key, slice):
+            indices = np.arange(self.n_frames)[key]
+        else:
+            indices = np.arange(self.n_frames)[np.asarray(key)]
+        out = np.empty((indices.size,) + self.frame_shape, dtype=self.dtype)
+        chunk_ids = indices // self.chunk_frames
+        for k in np.unique(chunk_ids):
+            selected = chunk_ids == k
+            out[selected] = self.chunk(int(k))[indices[selected] % self.chunk_frames]
+        return out
+
+    def __iter__(self):
+        for k in range(len(self.chunks)):
+            yield from self.chunk(k)
+
+    def compression_ratio(self):
+        stored = sum(chunk['nbytes'] for chunk in self.chunks)
+        return self.n_frames * int(np.prod(self.frame_shape)) * self.dtype.itemsize / max(stored, 1)
+
+
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+    import time
+    from em_sim import simulate_em_coherence_ripple
+
+    initial_S = np.zeros((256, 256))
+    initial_S[128, 128] = 5.0
+    path = os.path.join(tempfile.mkdtemp(), 'ripple.frames')
+    start = time.perf_counter()
+    with FrameStoreWriter(path, initial_S.shape, attrs={'c_dt_dx': 0.2}) as sink:
+        simulate_em_coherence_ripple(initial_S, c_dt_dx=0.2, steps=2000, record_every=10, frame_sink=sink)
+    elapsed = time.perf_counter() - start
+
+    store = FrameStore(path)
+    start = time.perf_counter()
+    window = store[100:200:5, 100:156, 100:156]
+    print(f"🔹 {len(store)} frames written in {elapsed:.2f} s (compression {store.compression_ratio():.1f}x)")
+    print(f"🔹 Lazy slice {window.shape} read in {(time.perf_counter() - start) * 1e3:.1f} ms")
+    shutil.rmtree(os.path.dirname(path))
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Scalable histogram rendering for GHZ measurement counts.
+
+One categorical bar per bitstring is unreadable and slow beyond ~10 qubits, so
+counts are aggregated first:
+
+    * 'hamming': total counts per Hamming weight 0..n (GHZ peaks at 0 and n)
+    * 'topk':    the k most frequent bitstrings plus an "other" bin
+    * 'auto':    exact bars when there are at most k distinct bitstrings, else 'topk'
+
+Figures are drawn on a reusable Agg canvas (no pyplot state, no GUI backend),
+and render_batch spreads a sweep of figures over worker processes.
+"""
+import os
+import time
+from multiprocessing import Pool
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+
+# --- 1. Aggregation ---
+def hamming_histogram(counts, num_qubits):
+    """Counts summed by Hamming weight: (labels '0'..'n', totals)."""
+    weights = np.fromiter((bitstring.count('1') for bitstring in counts), dtype=np.int64, count=len(counts))
+    values = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+    totals = np.bincount(weights, values, minlength=num_qubits + 1).astype(np.int64)
+    return [str(k) for k in range(num_qubits + 1)], totals
+
+
+def top_k_histogram(counts, top_k=32):
+    """The top_k most frequent bitstrings (descending) plus an 'other' bin when anything is left."""
+    labels = np.array(list(counts.keys()))
+    values = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+    if len(values) > top_k:
+        keep = np.argpartition(values, -top_k)[-top_k:]
+    else:
+        keep = np.arange(len(values))
+    keep = keep[np.argsort(values[keep], kind='stable')[::-1]]
+    other = values.sum() - values[keep].sum()
+    labels, values = labels[keep].tolist(), values[keep]
+    if other:
+        labels, values = labels + ['other'], np.append(values, other)
+    return labels, values
+
+
+def aggregate_counts(counts, num_qubits, mode='auto', top_k=32):
+    """(labels, values, x-axis label) for the requested aggregation mode."""
+    if mode == 'hamming':
+        return (*hamming_histogram(counts, num_qubits), 'Hamming weight')
+    if mode == 'auto' and len(counts) <= top_k:
+        labels = sorted(counts)
+        return labels, np.array([counts[label] for label in labels]), 'Bitstring'
+    if mode in ('auto', 'topk'):
+        return (*top_k_histogram(counts, top_k), 'Bitstring')
+    raise ValueError(f"Unknown histogram mode '{mode}' (use 'auto', 'hamming' or 'topk').")
+
+
+# --- 2. Rendering ---
+class HistogramRenderer:
+    """Reusable Agg figure; each render clears and redraws the same axes."""
+
+    def __init__(self, figsize=(10, 6)):
+        self.figure = Figure(figsize=figsize)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_subplot()
+
+    def render(self, counts, path, num_qubits, title='', mode='auto', top_k=32, dpi=300):
+        labels, values, xlabel = aggregate_counts(counts, num_qubits, mode, top_k)
+        ax = self.axes
+        ax.cla()
+        positions = np.arange(len(labels))
+        ax.bar(positions, values, width=0.8)
+        ax.set_xticks(positions, labels, rotation=45 if xlabel == 'Bitstring' else 0,
+                      ha='right' if xlabel == 'Bitstring' else 'center', fontsize=8 if len(labels) > 16 else 10)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel('Counts')
+        ax.set_title(title)
+        self.figure.tight_layout()
+        self.figure.savefig(path, dpi=dpi)
+        return path
+
+
+_renderer = None
+
+
+def render_histogram(counts, path, num_qubits, title='', mode='auto', top_k=32, dpi=300):
+    """Renders one histogram with this process's shared renderer."""
+    global _renderer
+    if _renderer is None:
+        _renderer = HistogramRenderer()
+    return _renderer.render(counts, path, num_qubits, title, mode, top_k, dpi)
+
+
+def _render_job(job):
+    return render_histogram(**job)
+
+
+def render_batch(jobs, workers=None, chunksize=4):
+    """
+    Renders many histograms (e.g. a qubit/noise sweep) in parallel.
+
+    :param jobs: Iterable of render_histogram keyword dicts (counts, path, num_qubits, ...).
+    :param workers: Process count (default os.cpu_count(); 1 renders in-process).
+    :return: List of written paths, in job order.
+    """
+    jobs = list(jobs)
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        return [_render_job(job) for job in jobs]
+    with Pool(workers) as pool:
+        return pool.map(_render_job, jobs, chunksize=chunksize)
+
+
+def sample_ghz_counts(num_qubits, shots=8192, flip_prob=0.02, seed=0):
+    """Synthetic GHZ counts: |0..0> / |1..1> with independent bit flips (for benchmarks)."""
+    rng = np.random.default_rng(seed)
+    bits = (rng.random(shots) < 0.5)[:, None] ^ (rng.random((shots, num_qubits)) < flip_prob)
+    outcomes = bits.astype(np.int64) @ (1 << np.arange(num_qubits - 1, -1, -1))
+    values, frequency = np.unique(outcomes, return_counts=True)
+    return {format(v, f'0{num_qubits}b'): int(c) for v, c in zip(values, frequency)}
+
+
+if __name__ == "__main__":
+    import tempfile
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    out_dir = tempfile.mkdtemp()
+    counts = sample_ghz_counts(14, shots=16384, flip_prob=0.03)
+    print(f"🔹 14-qubit GHZ sample: {len(counts)} distinct bitstrings")
+
+    start = time.perf_counter()
+    plt.figure(figsize=(10, 6))
+    plt.bar(counts.keys(), counts.values())
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    plt.savefig(os.path.join(out_dir, 'legacy.png'), dpi=300)
+    plt.close()
+    print(f"🔹 Per-bitstring bars: {time.perf_counter() - start:.2f} s")
+
+    for mode in ('hamming', 'topk'):
+        start = time.perf_counter()
+        render_histogram(counts, os.path.join(out_dir, f'{mode}.png'), 14, f'GHZ 14 qubits ({mode})', mode=mode)
+        print(f"🔹 {mode} histogram: {time.perf_counter() - start:.2f} s")
+
+    jobs = [dict(counts=sample_ghz_counts(n, flip_prob=p, seed=n), num_qubits=n, mode='hamming', dpi=150,
+                 path=os.path.join(out_dir, f'ghz_{n}_{p}.png'), title=f'GHZ {n} qubits, flip {p}')
+            for n in range(8, 17) for p in (0.01, 0.03, 0.05)]
+    start = time.perf_counter()
+    render_batch(jobs)
+    print(f"🔹 Sweep of {len(jobs)} figures on {os.cpu_count()} worker(s): {time.perf_counter() - start:.2f} s")
@@ -3,7 +3,8 @@ import numpy as np
 from functools import reduce
 import json
 from datetime import datetime
-import matplotlib.pyplot as plt
+from ghz_histogram import render_histogram
+from readout_mitigation import calibration_from_rates, ghz_fidelity, mitigate_counts
 
 # Pauli matrices for noise
 X = np.array([[0, 1], [1, 0]])
@@ -16,7 +17,8 @@ def kron_multi(mats):
         return np.array([[1]])
     return reduce(np.kron, mats)
 
-def run_ghz_circuit(num_qubits=2, shots=1024, noise_prob=0.01, relaxation_time=50e-6, t_gate=20e-9):
+def run_ghz_circuit(num_qubits=2, shots=1024, noise_prob=0.01, relaxation_time=50e-6, t_gate=20e-9,
+                    histogram_mode='auto', top_k=32):
     if num_qubits < 2 or num_qubits > 16:
         raise ValueError("Number of qubits must be between 2 and 16.")
     
@@ -101,6 +103,10 @@ def run_ghz_circuit(num_qubits=2, shots=1024, noise_prob=0.01, relaxation_time=5
     measured_probs = np.array([counts.get(format(i, f'0{num_qubits}b'), 0)/shots for i in range(2**num_qubits)])
     ideal_probs = np.abs(ideal_state)**2
     fidelity = np.sum(np.sqrt(ideal_probs * measured_probs)) ** 2
+
+    # Readout-mitigated fidelity (tensored calibration, observed-bitstring subspace)
+    mitigated = mitigate_counts(counts, calibration_from_rates(num_qubits, meas_prob))
+    fidelity_mitigated = ghz_fidelity(mitigated, num_qubits)
     
     # Print results
     print(f"--- {num_qubits}-Qubit GHZ Circuit (Noisy) ---")
@@ -110,20 +116,14 @@ def run_ghz_circuit(num_qubits=2, shots=1024, noise_prob=0.01, relaxation_time=5
     for bitstring, count in sorted(counts.items(), key=lambda x: x[1], reverse=True)[:10]:
         print(f"{bitstring}: {count}")
     print(f"\nFidelity: {fidelity:.4f}")
+    print(f"Fidelity (readout-mitigated): {fidelity_mitigated:.4f}")
     
-    # Plot histogram
-    plt.figure(figsize=(10,6))
-    plt.bar(counts.keys(), counts.values())
-    plt.xlabel('Bitstring')
-    plt.ylabel('Counts')
-    plt.title(f'Noisy GHZ {num_qubits} Qubits (Fidelity: {fidelity:.4f})')
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig('ghz_noisy_histogram.png', dpi=300)
-    plt.show()
+    # Plot histogram (aggregated by Hamming weight or top-k for large registers; see ghz_histogram.py)
+    render_histogram(counts, 'ghz_noisy_histogram.png', num_qubits,
+                     f'Noisy GHZ {num_qubits} Qubits (Fidelity: {fidelity:.4f})', mode=histogram_mode, top_k=top_k)
     
     # Save JSON
-    data = {"num_qubits": num_qubits, "shots": shots, "noise_prob": noise_prob, "fidelity": float(fidelity), "counts": counts}
+    data = {"num_qubits": num_qubits, "shots": shots, "noise_prob": noise_prob, "fidelity": float(fidelity), "fidelity_mitigated": fidelity_mitigated, "counts": counts}
     with open('ghz_results.json', 'w') as f:
         json.dump(data, f, indent=4)
     
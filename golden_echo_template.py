@@ -0,0 +1,142 @@
+"""
+ESQET golden-ratio echo templates (vectorized, index-correct).
+
+Implements the README template
+
+    delta h_echo(t) = sum_k A0 phi^-k e^{-gamma k t_echo,k} R(t - t_echo,k),
+    t_echo,k = k pi phi^-1 (2 G M / c^3)(1 + alpha),   gamma = (1 - phi^-1) / (2 G M / c^3),
+    A0 = 0.21 (FQC_horizon / 0.97)^4 / distance
+
+on a uniform grid given by a sample rate. Every echo is the ringdown R shifted
+by its exact delay, fractional samples included, as a phase ramp e^{-2 pi i f t_k}
+on the ringdown spectrum. Transforms are zero-padded to twice the template
+length, so echoes never wrap around, and echoes starting after the end of the
+template are dropped. All templates of a parameter batch are built together
+with batched real FFTs and returned as float32.
+"""
+import time
+import numpy as np
+import scipy.fft as sfft
+from scipy.signal import windows
+
+phi_inv = (np.sqrt(5) - 1) / 2  # 0.6180339887498948
+G = 6.6743e-11
+c = 3e8
+Msun = 1.988e30
+t_sun = G * Msun / c**3  # 4.925e-6 s
+
+
+# --- 1. Parameters and ringdown ---
+def echo_parameters(M, alpha=0.0, FQC_horizon=0.97, distance=1.0):
+    """Golden delay t_echo (s), damping gamma (1/s) and amplitude A0 (broadcast over the inputs)."""
+    M = np.asarray(M, dtype=float)
+    t_echo = np.pi * phi_inv * 2 * M * t_sun * (1 + np.asarray(alpha, dtype=float))
+    gamma = (1 - phi_inv) / (2 * M * t_sun)
+    A0 = 0.21 * (np.asarray(FQC_horizon, dtype=float) / 0.97)**4 / np.asarray(distance, dtype=float)
+    return t_echo, gamma, A0
+
+
+def ringdown_model(n_samples, sample_rate, M, dtype=np.float64):
+    """README ringdown e^{-t/tau} sin(2 pi f0 t) x Tukey(0.3), tau = 0.1 M t_sun, f0 = 50 / M; shape M.shape + (n,)."""
+    M = np.asarray(M, dtype=float)[..., None]
+    t = np.arange(n_samples) / sample_rate
+    rate = (1 / (0.1 * M * t_sun)).astype(dtype)
+    omega = (2 * np.pi * 50 / M).astype(dtype)
+    t = t.astype(dtype)
+    with np.errstate(under='ignore'):
+        return np.exp(-rate * t) * np.sin(omega * t) * windows.tukey(n_samples, 0.3).astype(dtype)
+
+
+# --- 2. Echo train ---
+def echo_weights(M, alpha=0.0, FQC_horizon=0.97, distance=1.0, n_echoes=15, max_delay=np.inf):
+    """Echo delays k t_echo and amplitudes A0 phi^-k e^{-gamma k (k t_echo)}, each (B, K); zero weight past max_delay."""
+    t_echo, gamma, A0 = (np.atleast_1d(v).ravel() for v in np.broadcast_arrays(*echo_parameters(
+        M, alpha, FQC_horizon, distance)))
+    k = np.arange(1, n_echoes + 1)
+    delays = k * t_echo[:, None]
+    weights = A0[:, None] * phi_inv**k * np.exp(-gamma[:, None] * k * delays)
+    weights[delays >= max_delay] = 0.0
+    return delays, weights
+
+
+def echo_train_spectrum(freqs, M, alpha=0.0, FQC_horizon=0.97, distance=1.0, n_echoes=15, max_delay=np.inf,
+                        dtype=np.complex128):
+    """
+    Transfer function sum_k w_k e^{-2 pi i f t_k} of the echo train, shape (B, F) for B parameter sets.
+
+    Echoes with delays >= max_delay, or weights below the resolution of `dtype`
+    relative to the strongest echo, are dropped. The phase ramps are built by
+    repeated multiplication, one vectorized pass over (B, F) per echo order.
+    """
+    delays, weights = echo_weights(M, alpha, FQC_horizon, distance, n_echoes, max_delay)
+    t_echo = delays[:, 0]
+    significant = np.nonzero(weights.max(axis=0) > np.finfo(dtype).eps * weights.max(initial=0.0))[0]
+    n_orders = significant[-1] + 1 if significant.size else 0
+
+    cycles = freqs[None, :] * t_echo[:, None]                          # one echo spacing, in cycles
+    angle = (2 * np.pi * (cycles - np.rint(cycles))).astype(np.empty(0, dtype).real.dtype)
+    step = np.empty(angle.shape, dtype=dtype)
+    step.real, step.imag = np.cos(angle), -np.sin(angle)
+    ramp = np.ones_like(step)
+    train = np.zeros_like(step)
+    for order in range(n_orders):
+        ramp *= step
+        train += weights[:, order, None].astype(train.real.dtype) * ramp
+    return train
+
+
+def esqet_echo_template(n_samples, sample_rate, M, distance=1.0, alpha=0.0, FQC_horizon=0.97, n_echoes=15,
+                        ringdown=None, dtype=np.float32, block=128):
+    """
+    Returns ESQET golden-ratio echo strain on t = arange(n_samples) / sample_rate.
+
+    :param M: Total mass in solar masses (scalar or array; all parameters broadcast).
+    :param distance: Luminosity distance in Gpc.
+    :param alpha: Coherence radius excess (0 = minimal Möbius surface).
+    :param FQC_horizon: Horizon coherence (0-1).
+    :param ringdown: Optional ringdown samples (n,) or (B, n) replacing ringdown_model.
+    :param dtype: Output dtype; float32 output also runs the FFTs in single precision.
+    :param block: Templates transformed together (keeps the working set in cache).
+    :return: Strain of shape broadcast(M, distance, alpha, FQC_horizon).shape + (n_samples,), in `dtype`.
+    """
+    shape = np.broadcast_shapes(np.shape(M), np.shape(distance), np.shape(alpha), np.shape(FQC_horizon))
+    M_b, distance_b, alpha_b, FQC_b = (np.broadcast_to(np.asarray(v, dtype=float), shape).ravel()
+                                       for v in (M, distance, alpha, FQC_horizon))
+    if ringdown is not None:
+        ringdown = np.broadcast_to(np.asarray(ringdown, dtype=float), (M_b.size, n_samples))
+    work = np.float32 if np.dtype(dtype) == np.float32 else np.float64
+
+    n_fft = sfft.next_fast_len(2 * n_samples, real=True)
+    freqs = sfft.rfftfreq(n_fft, d=1 / sample_rate)
+    h = np.empty((M_b.size, n_samples), dtype=dtype)
+    for b0 in range(0, M_b.size, block):
+        b = slice(b0, b0 + block)
+        source = ringdown_model(n_samples, sample_rate, M_b[b], work) if ringdown is None else ringdown[b]
+        spectrum = sfft.rfft(source.astype(work, copy=False), n=n_fft, axis=-1)
+        spectrum *= echo_train_spectrum(freqs, M_b[b], alpha_b[b], FQC_b[b], distance_b[b], n_echoes,
+                                        max_delay=n_samples / sample_rate, dtype=spectrum.dtype)
+        h[b] = sfft.irfft(spectrum, n=n_fft, axis=-1)[:, :n_samples]
+    return h.reshape(shape + (n_samples,))
+
+
+if __name__ == "__main__":
+    # Integer-sample echo delays must reproduce a direct shifted sum exactly
+    sample_rate, n = 4096.0, 2048
+    M = 64 / (np.pi * phi_inv * 2 * t_sun * sample_rate)  # t_echo = 64 samples
+    ringdown = np.zeros(n)
+    ringdown[:32] = np.hanning(32)
+    h = esqet_echo_template(n, sample_rate, M, ringdown=ringdown, dtype=np.float64)
+    t_echo, gamma, A0 = echo_parameters(M)
+    direct = np.zeros(n)
+    for k in range(1, 16):
+        shift = 64 * k
+        direct[shift:] += A0 * phi_inv**k * np.exp(-gamma * k * (k * t_echo)) * ringdown[:n - shift]
+    print(f"🔹 Max deviation from direct shifted sum: {np.abs(h - direct).max():.2e} "
+          f"(peak {np.abs(direct).max():.2e})")
+
+    masses = np.geomspace(30, 300, 4000)
+    start = time.perf_counter()
+    bank = esqet_echo_template(4096, 16384.0, masses[:, None], alpha=np.array([0.0, 0.5, 1.0]))
+    elapsed = time.perf_counter() - start
+    print(f"🔹 {bank.shape[0] * bank.shape[1]} templates x {bank.shape[-1]} samples ({bank.dtype}) "
+          f"in {elapsed:.2f} s -> {bank.shape[0] * bank.shape[1] / elapsed:.0f} templates/s")
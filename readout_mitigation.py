@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Scalable readout-error mitigation on sparse counts.
+
+Readout errors are modelled as independent per-qubit 2x2 assignment matrices
+(tensored calibration), e.g. the 0.5% bit-flip `meas_prob` of run_ghz_circuit.
+Instead of inverting the 2^n x 2^n calibration matrix, the mitigation is
+solved only in the subspace of observed bitstrings: couplings between observed
+strings within a Hamming distance cutoff are generated on the fly and the
+system is solved iteratively (GMRES), so 20-30 qubit GHZ counts mitigate in
+milliseconds.
+
+Calibration rows are indexed by character position in the counts keys, so the
+same code works for run_ghz_circuit (qubit 0 first) and Qiskit (qubit 0 last).
+"""
+import time
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.linalg import LinearOperator, gmres
+
+DEFAULT_DISTANCE = 3  # Hamming-distance cutoff for subspace couplings
+
+
+# --- 1. Tensored calibration ---
+def calibration_from_rates(num_bits, p01, p10=None):
+    """
+    Per-bit assignment matrices A[k] = [[P(0|0), P(0|1)], [P(1|0), P(1|1)]].
+
+    :param p01: P(read 1 | prepared 0), scalar or per-bit array.
+    :param p10: P(read 0 | prepared 1); defaults to a symmetric bit flip.
+    """
+    p01 = np.broadcast_to(np.asarray(p01, dtype=float), (num_bits,))
+    p10 = p01 if p10 is None else np.broadcast_to(np.asarray(p10, dtype=float), (num_bits,))
+    cal = np.empty((num_bits, 2, 2))
+    cal[:, 0, 0], cal[:, 1, 0] = 1 - p01, p01
+    cal[:, 0, 1], cal[:, 1, 1] = p10, 1 - p10
+    return cal
+
+
+def calibration_from_counts(counts_zero, counts_one):
+    """Tensored calibration from two runs: all bits prepared in 0, and all in 1."""
+    _, bits0, probs0 = counts_to_arrays(counts_zero)
+    _, bits1, probs1 = counts_to_arrays(counts_one)
+    return calibration_from_rates(bits0.shape[1], probs0 @ bits0, probs1 @ (1 - bits1))
+
+
+# --- 2. Sparse counts handling ---
+def counts_to_arrays(counts):
+    """Returns (bitstrings, bits (K, n) uint8, probabilities (K,)) for a counts dict."""
+    bitstrings = [b.replace(' ', '') for b in counts]
+    values = np.array(list(counts.values()), dtype=float)
+    n_bits = len(bitstrings[0])
+    bits = (np.frombuffer(''.join(bitstrings).encode(), dtype=np.uint8) - ord('0')).reshape(-1, n_bits)
+    return bitstrings, bits, values / values.sum()
+
+
+def _pack_keys(bits):
+    """Packs each bitstring into a uint64 key (bit k = character position k)."""
+    if bits.shape[1] > 64:
+        raise ValueError("Sparse readout mitigation supports at most 64 bits.")
+    return (bits.astype(np.uint64) << np.arange(bits.shape[1], dtype=np.uint64)).sum(axis=1, dtype=np.uint64)
+
+
+def _popcount(keys):
+    """Number of set bits per uint64."""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(keys)
+    as_bytes = keys.view(np.uint8).reshape(*keys.shape, 8)
+    return np.unpackbits(as_bytes, axis=-1).sum(axis=-1)
+
+
+def reduced_assignment_matrix(bits, calibration, distance=DEFAULT_DISTANCE, chunk_size=2048):
+    """
+    Assignment matrix restricted to the observed bitstrings (K x K, sparse).
+
+    A[i, j] = prod_k cal[k, s_i[k], s_j[k]] for pairs within `distance` flips;
+    columns are renormalized to 1 to account for the truncated probability mass.
+    """
+    keys = _pack_keys(bits)
+    n_strings = bits.shape[0]
+    bit_index = np.arange(bits.shape[1])
+    # log A for an unflipped bit, and the log-ratio added for each flipped bit, per column string
+    log_diag = np.log(calibration[bit_index, bits, bits])
+    log_flip = np.log(calibration[bit_index, 1 - bits, bits]) - log_diag
+    log_col = log_diag.sum(axis=1)
+
+    rows, cols, vals = [], [], []
+    for start in range(0, n_strings, chunk_size):
+        stop = min(start + chunk_size, n_strings)
+        xor = keys[start:stop, None] ^ keys[None, :]
+        i, j = np.nonzero(_popcount(xor) <= distance)
+        flips = ((xor[i, j][:, None] >> bit_index.astype(np.uint64)) & np.uint64(1)).astype(bool)
+        log_vals = log_col[j] + np.where(flips, log_flip[j], 0.0).sum(axis=1)
+        rows.append(i + start)
+        cols.append(j)
+        vals.append(np.exp(log_vals))
+
+    matrix = csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                        shape=(n_strings, n_strings))
+    col_sums = np.asarray(matrix.sum(axis=0)).ravel()
+    return (matrix @ csr_matrix((1 / col_sums, (np.arange(n_strings), np.arange(n_strings))),
+                                shape=(n_strings, n_strings))).tocsr()
+
+
+def nearest_probability_distribution(quasi):
+    """Closest probability vector (L2) to a quasi-probability vector (Smolin-Gambetta-Smith)."""
+    quasi = np.asarray(quasi, dtype=float)
+    order = np.argsort(quasi)
+    sorted_q = quasi[order]
+    n = sorted_q.size
+    # Entries are zeroed from the smallest up while their share of the dropped mass keeps them negative
+    dropped_mass = np.concatenate([[0.0], np.cumsum(sorted_q)[:-1]])
+    dropped = sorted_q + dropped_mass / (n - np.arange(n)) < 0
+    first = int(np.argmin(dropped))
+    probs = np.zeros(n)
+    probs[order[first:]] = sorted_q[first:] + dropped_mass[first] / (n - first)
+    return probs
+
+
+# --- 3. Mitigation ---
+def mitigate_counts(counts, calibration, distance=DEFAULT_DISTANCE, physical=True, tol=1e-10, max_iter=200):
+    """
+    Solves A_S x = p in the observed-bitstring subspace.
+
+    :param counts: {bitstring: count} from any backend.
+    :param calibration: (n, 2, 2) per-bit assignment matrices.
+    :param physical: Project the quasi-probabilities onto the probability simplex.
+    :return: {bitstring: (quasi-)probability}
+    """
+    bitstrings, bits, probs = counts_to_arrays(counts)
+    if bits.shape[1] != calibration.shape[0]:
+        raise ValueError("Calibration size does not match the counts bit width.")
+    matrix = reduced_assignment_matrix(bits, calibration, distance)
+
+    operator = LinearOperator(matrix.shape, matvec=matrix.dot, dtype=float)
+    jacobi = LinearOperator(matrix.shape, matvec=lambda x: x / matrix.diagonal(), dtype=float)
+    quasi, info = gmres(operator, probs, x0=probs, rtol=tol, maxiter=max_iter, M=jacobi)
+    if info != 0:
+        raise RuntimeError(f"Readout mitigation did not converge (GMRES info={info}).")
+    quasi /= quasi.sum()
+    values = nearest_probability_distribution(quasi) if physical else quasi
+    return dict(zip(bitstrings, values))
+
+
+def ghz_fidelity(probabilities, num_qubits):
+    """Bhattacharyya overlap with the ideal GHZ populations, as in run_ghz_circuit."""
+    p0 = max(probabilities.get('0' * num_qubits, 0.0), 0.0)
+    p1 = max(probabilities.get('1' * num_qubits, 0.0), 0.0)
+    return float(0.5 * (np.sqrt(p0) + np.sqrt(p1)) ** 2)
+
+
+def sample_ghz_counts(num_qubits, shots, meas_prob=0.005, rng=None):
+    """Sparse GHZ counts with independent readout bit flips (no 2^n state vector)."""
+    rng = np.random.default_rng(rng)
+    bits = np.repeat(rng.integers(0, 2, size=(shots, 1), dtype=np.uint8), num_qubits, axis=1)
+    bits ^= (rng.random((shots, num_qubits)) < meas_prob).astype(np.uint8)
+    strings, counts = np.unique(bits, axis=0, return_counts=True)
+    return {''.join(map(str, row)): int(c) for row, c in zip(strings, counts)}
+
+
+if __name__ == "__main__":
+    for num_qubits in (8, 20, 30):
+        counts = sample_ghz_counts(num_qubits, shots=8192, meas_prob=0.005, rng=1)
+        raw = ghz_fidelity({k: v / 8192 for k, v in counts.items()}, num_qubits)
+        start = time.perf_counter()
+        mitigated = mitigate_counts(counts, calibration_from_rates(num_qubits, 0.005))
+        elapsed = (time.perf_counter() - start) * 1e3
+        print(f"🔹 {num_qubits:2d} qubits, {len(counts):4d} observed strings: "
+              f"fidelity {raw:.4f} -> {ghz_fidelity(mitigated, num_qubits):.4f} ({elapsed:.1f} ms)")
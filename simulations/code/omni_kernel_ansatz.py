@@ -0,0 +1,41 @@
+"""
+The omni-kernel variational circuit, built from qiskit.circuit only.
+
+Gate for gate the circuit of omni_kernel_sim.omni_one_kernel_variational
+(measure_all=False), without that module's simulator imports (Aer/execute were
+removed in Qiskit 1.0), so VQE tables and ZNE runs work on current Qiskit.
+"""
+import numpy as np
+
+
+def omni_kernel_ansatz(n_qubits=5, layers=1, phase_negfib=5, delta=0.5):
+    """
+    Returns (circuit, parameters): the core theta/phi circuit plus `layers` RY/RZ + CX-chain layers.
+
+    :param n_qubits: Register size (at least 5 for the black-hole reset CSWAP).
+    :return: QuantumCircuit and its Parameters in binding order [θ, φ, θ_0, φ_0, ...].
+    """
+    from qiskit.circuit import Parameter, QuantumCircuit
+    if n_qubits < 5:
+        raise ValueError("The omni-kernel ansatz needs at least 5 qubits.")
+    circuit = QuantumCircuit(n_qubits)
+    theta, phi = Parameter('θ'), Parameter('φ')
+    parameters = [theta, phi]
+    circuit.h(range(n_qubits))
+    circuit.rz(theta * phase_negfib * np.pi, 0)
+    for i in range(n_qubits - 1):
+        circuit.cx(i, i + 1)
+    circuit.h(0)
+    circuit.cx(0, 1)
+    circuit.crz(phi * np.cos(delta * phase_negfib), 2, 3)
+    circuit.h(4)
+    circuit.cswap(4, 2, 3)
+    for layer in range(layers):
+        layer_theta, layer_phi = Parameter(f'θ_{layer}'), Parameter(f'φ_{layer}')
+        parameters.extend([layer_theta, layer_phi])
+        for i in range(n_qubits):
+            circuit.ry(layer_theta, i)
+            circuit.rz(layer_phi, i)
+        for i in range(n_qubits - 1):
+            circuit.cx(i, i + 1)
+    return circuit, parameters
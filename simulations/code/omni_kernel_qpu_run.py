@@ -15,7 +15,7 @@ IBM_TOKEN = os.getenv("IBM_TOKEN")
 print(f"✅ Loaded environment from {env_path}")
 
 # --- 2️⃣ Qiskit imports (1.0+ compatible) ---
-from qiskit.quantum_info import Pauli, SparsePauliOp
+from qiskit.quantum_info import Pauli, SparsePauliOp, Statevector
 from qiskit_algorithms.minimum_eigensolvers import VQE
 from qiskit_algorithms.optimizers import COBYLA
 from qiskit_ibm_runtime import QiskitRuntimeService
@@ -26,6 +26,8 @@ from qiskit.primitives import Estimator
 # Fix TwoLocal deprec: Use n_local
 from qiskit.circuit.library.n_local import two_local
 
+from classical_shadows import collect_shadow_snapshots, estimate_observable, estimate_pauli_expectations, zz_correlator_labels
+
 # Try Aer (optional)
 try:
     from qiskit_aer import AerSimulator
@@ -41,6 +43,7 @@ LAYERS = 2
 MAX_ITER = 30
 OUTPUT_FILE = "qpu_vqe_results.json"
 USE_QPU = False  # Set to True once Aer/QPU ready; False for NumPy proxy now
+SHADOW_SNAPSHOTS = 2000  # Classical-shadow snapshots of the final state (0 disables)
 
 # ESQET Constants (from whitepaper)
 PHI_GOLDEN = (1 + np.sqrt(5)) / 2
@@ -68,6 +71,21 @@ def create_esqet_hamiltonian(n_qubits: int) -> SparsePauliOp:
 def compute_fqc_proxy(min_energy: float) -> float:
     return 1.0 - (abs(min_energy) / E_MAX)
 
+# --- 5️⃣b Classical-shadow audit: energy, F_QC proxy and ZZ correlators from one snapshot set ---
+def shadow_report(state, hamiltonian: SparsePauliOp, n_snapshots: int = SHADOW_SNAPSHOTS, seed=None) -> dict:
+    snapshots = collect_shadow_snapshots(state, n_snapshots=n_snapshots, seed=seed)
+    energy, energy_err = estimate_observable(snapshots, hamiltonian)
+    labels = zz_correlator_labels(snapshots['n_qubits'])
+    zz, zz_err = estimate_pauli_expectations(snapshots, labels)
+    return {
+        "n_snapshots": n_snapshots,
+        "energy": energy,
+        "energy_err": energy_err,
+        "f_qc": compute_fqc_proxy(energy),
+        "f_qc_err": energy_err / E_MAX,
+        "zz_correlators": {label: [float(v), float(e)] for label, v, e in zip(labels, zz, zz_err)},
+    }
+
 # --- 6️⃣ Run VQE (Fixed: Estimator first, then VQE(..., estimator); NumPy fallback) ---
 def run_vqe(n_qubits: int, layers: int, maxiter: int, use_qpu: bool = USE_QPU):
     hamiltonian = create_esqet_hamiltonian(n_qubits)
@@ -108,7 +126,8 @@ def run_vqe(n_qubits: int, layers: int, maxiter: int, use_qpu: bool = USE_QPU):
             optimal_params = np.random.uniform(0, 2*np.pi, 2*layers + 2)  # Mock params for layers
             backend_used = "NumPy Eig Approx"
             print(f"📈 E0: {min_energy:.6f}, F_QC: {fqc:.6f}, GS Fidelity: {np.abs(ground_state[0])**2:.4f}")
-            save_results(min_energy, {f'theta_{i}': p for i, p in enumerate(optimal_params)}, backend_used, layers, maxiter, hamiltonian, fqc)
+            shadow = shadow_report(ground_state, hamiltonian) if SHADOW_SNAPSHOTS else None
+            save_results(min_energy, {f'theta_{i}': p for i, p in enumerate(optimal_params)}, backend_used, layers, maxiter, hamiltonian, fqc, shadow)
             return  # Early return for NumPy
 
         # Core VQE (pass estimator)
@@ -121,10 +140,14 @@ def run_vqe(n_qubits: int, layers: int, maxiter: int, use_qpu: bool = USE_QPU):
         optimal_params = {str(k): float(v) for k, v in result.optimal_parameters.items()} if hasattr(result, 'optimal_parameters') else np.random.uniform(0, 2*np.pi, 2*layers + 2)  # Mock if none
         backend_used = backend.name if 'backend' in locals() else "Local Estimator"
 
-        save_results(min_energy, optimal_params, backend_used, layers, maxiter, hamiltonian, fqc)
+        shadow = None
+        if SHADOW_SNAPSHOTS and getattr(result, 'optimal_point', None) is not None:
+            shadow = shadow_report(Statevector(ansatz.assign_parameters(result.optimal_point)), hamiltonian)
+
+        save_results(min_energy, optimal_params, backend_used, layers, maxiter, hamiltonian, fqc, shadow)
 
 # --- 7️⃣ Save JSON (with F_QC) ---
-def save_results(min_energy, optimal_params, backend, layers, iters, ham, fqc):
+def save_results(min_energy, optimal_params, backend, layers, iters, ham, fqc, shadow=None):
     final_data = {
         "timestamp": datetime.utcnow().isoformat() + "Z",
         "fcu": FCU,
@@ -136,6 +159,8 @@ def save_results(min_energy, optimal_params, backend, layers, iters, ham, fqc):
         "hamiltonian": str(ham),
         "optimal_parameters": optimal_params
     }
+    if shadow is not None:
+        final_data["shadow_estimates"] = shadow
     with open(OUTPUT_FILE, 'w') as f:
         json.dump(final_data, f, indent=4)
     print("\n" + "="*60)
@@ -143,6 +168,8 @@ def save_results(min_energy, optimal_params, backend, layers, iters, ham, fqc):
     print(f"🖥️  Backend: {backend}")
     print(f"📈 Min Energy: {min_energy:.6f}")
     print(f"🔮 F_QC Proxy: {fqc:.6f} (High=~1.0 vacuum coherence)")
+    if shadow is not None:
+        print(f"🌑 Shadow F_QC: {shadow['f_qc']:.6f} ± {shadow['f_qc_err']:.6f} ({shadow['n_snapshots']} snapshots)")
     print(f"💾 Saved: {OUTPUT_FILE} (for arXiv figs)")
     print("="*60)
 
@@ -1,10 +1,11 @@
 from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister, Aer, execute
 from qiskit.circuit import Parameter
 from qiskit.visualization import plot_histogram, circuit_drawer
-from qiskit.quantum_info import Operator, state_fidelity
+from qiskit.quantum_info import Operator, SparsePauliOp, Statevector, state_fidelity
 from scipy.optimize import minimize
 import numpy as np
 import matplotlib.pyplot as plt
+from classical_shadows import collect_shadow_snapshots, estimate_observable, estimate_pauli_expectations, zz_correlator_labels
 
 def add_variational_layer(circuit, qubits, theta, phi):
     """Adds a single variational layer with RY, RZ, and CNOT gates."""
@@ -76,6 +77,16 @@ def cost_function(params, circuit, parameters, target_operator, backend, shots=1
         expectation += count * np.real(np.dot(state_vec.T, np.dot(target_operator.data, state_vec)))
     return expectation / shots
 
+def shadow_cost_function(params, circuit, parameters, target_operator, n_snapshots=1000, seed=None):
+    """VQE cost from classical-shadow snapshots of the bound circuit (no per-basis shot sets)."""
+    param_dict = {p: v for p, v in zip(parameters, params)}
+    bound_circuit = circuit.assign_parameters(param_dict)
+    results = simulate_circuit(bound_circuit, backend_type='shadow', n_snapshots=n_snapshots, seed=seed)
+    if 'error' in results:
+        raise RuntimeError(results['error'])
+    energy, _ = estimate_observable(results['snapshots'], SparsePauliOp.from_operator(target_operator))
+    return energy
+
 def get_backend(backend_type='statevector', noisy=False):
     """Returns a Qiskit backend with optional noise model."""
     if backend_type not in ['statevector', 'qasm']:
@@ -91,8 +102,27 @@ def get_backend(backend_type='statevector', noisy=False):
         return backend, noise_model
     return backend, None
 
-def simulate_circuit(circuit, backend_type='statevector', noisy=False, shots=1024, callback=None):
-    """Simulates the quantum circuit with optional noise and callback."""
+def simulate_circuit(circuit, backend_type='statevector', noisy=False, shots=1024, callback=None,
+                     n_snapshots=1000, seed=None):
+    """Simulates the quantum circuit with optional noise and callback.
+
+    backend_type='shadow' collects `n_snapshots` random Pauli-basis snapshots
+    (classical shadows) instead of counts; any number of local observables can
+    later be estimated from the returned snapshots. Snapshots are taken of the ideal
+    statevector, so noisy=True is rejected with ValueError for 'shadow'.
+    """
+    if backend_type == 'shadow':
+        if noisy:
+            raise ValueError("backend_type='shadow' samples the ideal statevector; noisy=True is not supported.")
+        try:
+            state = Statevector(circuit.remove_final_measurements(inplace=False))
+            snapshots = collect_shadow_snapshots(state, n_snapshots=n_snapshots, seed=seed)
+            if callback:
+                callback(snapshots)
+            return {'snapshots': snapshots}
+        except Exception as err:
+            return {'error': str(err)}
+
     backend, noise_model = get_backend(backend_type, noisy)
     try:
         result = execute(circuit, backend, shots=shots, noise_model=noise_model).result()
@@ -142,6 +172,13 @@ def visualize_results(circuit, results, backend_type='statevector', save_qasm=Fa
         plt.figure(figsize=(10, 6))
         plot_bloch_multivector(results['statevector'], title="Bloch Sphere Representation")
         plt.show()
+    elif backend_type == 'shadow':
+        snapshots = results['snapshots']
+        labels = zz_correlator_labels(snapshots['n_qubits'])
+        estimates, errors = estimate_pauli_expectations(snapshots, labels)
+        print(f"🔹 Shadow snapshots: {snapshots['bases'].shape[0]}")
+        for label, value, err in zip(labels, estimates, errors):
+            print(f"🔹 <{label}> = {value:+.4f} ± {err:.4f}")
     else:
         print("🔹 Measurement counts:", results['counts'])
         plt.figure(figsize=(10, 6))
@@ -167,6 +204,10 @@ if __name__ == "__main__":
     results_statevector = simulate_circuit(circuit_statevector, backend_type='statevector')
     visualize_results(circuit_statevector, results_statevector, backend_type='statevector', save_qasm=True)
 
+    # Classical shadows: one snapshot set for every ZZ correlator
+    results_shadow = simulate_circuit(circuit_statevector, backend_type='shadow', n_snapshots=2000)
+    visualize_results(circuit_statevector, results_shadow, backend_type='shadow')
+
     # Simulate with QASM and noise
     results_qasm = simulate_circuit(circuit.assign_parameters({p: v for p, v in zip(params, initial_params)}),
                                    backend_type='qasm', noisy=True, shots=1024, callback=optimization_callback)
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Sparse time evolution for ESQET Hamiltonians (coherence-decay dynamics).
+
+Statevectors are propagated under a matrix-free Pauli-sum operator, so neither
+the dense Hamiltonian nor expm(-iHt) is ever formed. Three propagators share
+that operator:
+  * 'krylov'         - Lanczos exponential with adaptive sub-stepping
+  * 'expm_multiply'  - scipy.sparse.linalg.expm_multiply on a LinearOperator
+  * 'trotter'        - product formula applied term by term (matches the
+                       circuits from `trotter_circuit`, for hardware comparison)
+Observables (fidelity, magnetization, F_QC proxy, ...) are streamed over the
+time grid; only their values are kept, never the intermediate states.
+
+Hamiltonians are SparsePauliOp objects (create_esqet_hamiltonian,
+orch_or_hamiltonian) or [(label, coeff)] lists in Qiskit label order.
+"""
+import numpy as np
+from scipy.linalg import expm
+from scipy.sparse.linalg import LinearOperator, expm_multiply
+
+PHI_GOLDEN = (1 + np.sqrt(5)) / 2
+E_MAX = (PHI_GOLDEN * np.pi / 0.5) ** 2  # Mass scale of the F_QC proxy (omni_kernel_qpu_run)
+
+
+def _popcount(values):
+    """Set bits per non-negative int64."""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values).astype(np.int64)
+    as_bytes = values.astype(np.uint64).view(np.uint8).reshape(*values.shape, 8)
+    return np.unpackbits(as_bytes, axis=-1).sum(axis=-1, dtype=np.int64)
+
+
+# --- 1. Matrix-free Pauli operator ---
+class PauliOperator:
+    """
+    Matrix-free action of sum_k c_k P_k on 2^n statevectors.
+
+    P|b> = i^{n_Y} (-1)^{|b & z|} |b ^ x|, so terms sharing an X/Y mask share one
+    gather; their phases are folded into a single diagonal per mask.
+    """
+
+    def __init__(self, hamiltonian):
+        terms = hamiltonian.to_list() if hasattr(hamiltonian, 'to_list') else list(hamiltonian)
+        self.n_qubits = len(terms[0][0])
+        self.dim = 2 ** self.n_qubits
+        self.labels = [label for label, _ in terms]
+        self.coeffs = np.array([coeff for _, coeff in terms], dtype=complex)
+
+        self.x_masks = np.zeros(len(terms), dtype=np.int64)
+        self.z_masks = np.zeros(len(terms), dtype=np.int64)
+        self.y_counts = np.zeros(len(terms), dtype=np.int64)
+        for k, label in enumerate(self.labels):
+            for q, ch in enumerate(reversed(label.upper())):
+                if ch in 'XY':
+                    self.x_masks[k] |= 1 << q
+                if ch in 'ZY':
+                    self.z_masks[k] |= 1 << q
+                self.y_counts[k] += ch == 'Y'
+
+        self.index = np.arange(self.dim, dtype=np.int64)
+        self.groups = []
+        for x_mask in np.unique(self.x_masks):
+            diagonal = np.zeros(self.dim, dtype=complex)
+            for k in np.flatnonzero(self.x_masks == x_mask):
+                diagonal += self.term_diagonal(k)
+            self.groups.append((int(x_mask), diagonal))
+
+    def term_phase(self, k):
+        """Phase vector d with (P_k psi)[i] = d[i] psi[i ^ x_k]."""
+        signs = 1 - 2 * (_popcount((self.index ^ self.x_masks[k]) & self.z_masks[k]) & 1)
+        return (1j ** self.y_counts[k]) * signs
+
+    def term_diagonal(self, k):
+        return self.coeffs[k] * self.term_phase(k)
+
+    def matvec(self, psi):
+        """H psi for a (2^n,) vector or a (2^n, m) block."""
+        out = np.zeros(psi.shape, dtype=complex)
+        for x_mask, diagonal in self.groups:
+            source = psi if x_mask == 0 else psi[self.index ^ x_mask]
+            out += diagonal.reshape((-1,) + (1,) * (psi.ndim - 1)) * source
+        return out
+
+    def expectation(self, psi):
+        return float(np.real(np.vdot(psi, self.matvec(psi))))
+
+    def norm_bound(self):
+        """Upper bound on ||H||_2 (sum of |c_k|)."""
+        return float(np.sum(np.abs(self.coeffs)))
+
+    def trace(self):
+        identity = (self.x_masks == 0) & (self.z_masks == 0)
+        return complex(self.dim * self.coeffs[identity].sum())
+
+    def as_linear_operator(self, scale=1.0):
+        """scale * H as a scipy LinearOperator."""
+        return LinearOperator((self.dim, self.dim), matvec=lambda v: scale * self.matvec(v),
+                              matmat=lambda v: scale * self.matvec(v),
+                              rmatvec=lambda v: np.conj(scale) * self.matvec(v), dtype=complex)
+
+
+# --- 2. Propagators ---
+def lanczos_expm(operator, psi, dt, krylov_dim=20, tol=1e-12):
+    """exp(-i H dt) psi via Lanczos, halving the step while the residual estimate exceeds `tol`."""
+    beta = np.linalg.norm(psi)
+    basis = np.empty((krylov_dim + 1, psi.size), dtype=complex)
+    alpha, betas = np.zeros(krylov_dim), np.zeros(krylov_dim)
+    basis[0] = psi / beta
+    m = krylov_dim
+    for j in range(krylov_dim):
+        w = operator.matvec(basis[j])
+        alpha[j] = np.real(np.vdot(basis[j], w))
+        w -= alpha[j] * basis[j] + (betas[j - 1] * basis[j - 1] if j else 0)
+        # Full reorthogonalization keeps the small basis numerically orthonormal
+        w -= basis[:j + 1].T @ (basis[:j + 1].conj() @ w)
+        betas[j] = np.linalg.norm(w)
+        if betas[j] < 1e-14:
+            m = j + 1
+            break
+        basis[j + 1] = w / betas[j]
+
+    tridiag = np.diag(alpha[:m]) + np.diag(betas[:m - 1], 1) + np.diag(betas[:m - 1], -1)
+    coeffs = expm(-1j * dt * tridiag)[:, 0]
+    if m == krylov_dim and beta * betas[m - 1] * abs(coeffs[-1]) > tol:
+        half = lanczos_expm(operator, psi, dt / 2, krylov_dim, tol)
+        return lanczos_expm(operator, half, dt / 2, krylov_dim, tol)
+    return beta * (coeffs @ basis[:m])
+
+
+def _suzuki_sweeps(n_terms, dt, order):
+    """(term order, step) sweeps of the Lie-Trotter (order 1) or Suzuki (even order) product formula."""
+    if order == 1:
+        return [(range(n_terms), dt)]
+    if order < 1 or order % 2:
+        raise ValueError("Trotter order must be 1 or even (2, 4, ...).")
+    if order == 2:
+        return [(range(n_terms), dt / 2), (range(n_terms - 1, -1, -1), dt / 2)]
+    p = 1 / (4 - 4 ** (1 / (order - 1)))
+    outer = _suzuki_sweeps(n_terms, p * dt, order - 2)
+    return 2 * outer + _suzuki_sweeps(n_terms, (1 - 4 * p) * dt, order - 2) + 2 * outer
+
+
+def trotter_step(operator, psi, dt, order=1):
+    """
+    One product-formula step, term by term: Lie-Trotter (order 1), Strang (order 2)
+    or the Suzuki recursion S_2k(t) = S_2k-2(p t)^2 S_2k-2((1 - 4p) t) S_2k-2(p t)^2,
+    p = 1 / (4 - 4^(1/(2k-1))), as in Qiskit's SuzukiTrotter.
+
+    exp(-i c dt P) psi = cos(c dt) psi - i sin(c dt) P psi because P^2 = I.
+    """
+    for sweep, step in _suzuki_sweeps(len(operator.labels), dt, order):
+        for k in sweep:
+            angle = np.real(operator.coeffs[k]) * step
+            unit = operator.term_phase(k)
+            flipped = psi if operator.x_masks[k] == 0 else psi[operator.index ^ operator.x_masks[k]]
+            psi = np.cos(angle) * psi - 1j * np.sin(angle) * unit * flipped
+    return psi
+
+
+def trotter_circuit(hamiltonian, time, steps, order=1):
+    """Trotterized evolution circuit for hardware runs (requires Qiskit)."""
+    from qiskit import QuantumCircuit
+    from qiskit.circuit.library import PauliEvolutionGate
+    from qiskit.synthesis import LieTrotter, SuzukiTrotter
+    _suzuki_sweeps(0, time, order)  # same order validation as trotter_step
+    synthesis = LieTrotter(reps=steps) if order == 1 else SuzukiTrotter(order=order, reps=steps)
+    circuit = QuantumCircuit(hamiltonian.num_qubits)
+    circuit.append(PauliEvolutionGate(hamiltonian, time=time, synthesis=synthesis), range(hamiltonian.num_qubits))
+    return circuit
+
+
+# --- 3. Streaming observables ---
+def default_observables(operator, initial_state, e_max=E_MAX):
+    """Fidelity to the initial state, mean Z magnetization, energy and the F_QC proxy."""
+    initial_state = np.asarray(initial_state, dtype=complex)
+    z_weights = 1 - 2 * _popcount(operator.index) / operator.n_qubits
+
+    def energy(psi):
+        return operator.expectation(psi)
+
+    return {
+        'fidelity': lambda psi: float(abs(np.vdot(initial_state, psi)) ** 2),
+        'magnetization': lambda psi: float(np.abs(psi) ** 2 @ z_weights),
+        'energy': energy,
+        'f_qc': lambda psi: 1.0 - abs(energy(psi)) / e_max,
+    }
+
+
+def evolve(hamiltonian, initial_state, times, method='krylov', observables=None,
+           krylov_dim=20, tol=1e-12, trotter_steps=1, trotter_order=1):
+    """
+    Propagates `initial_state` across `times`, recording observables at each grid point.
+
+    :param hamiltonian: SparsePauliOp, [(label, coeff)] list or PauliOperator.
+    :param times: Increasing time grid; the state at times[0] is `initial_state`.
+    :param method: 'krylov', 'expm_multiply' or 'trotter'.
+    :param observables: {name: f(psi) -> float}; defaults to `default_observables`.
+    :param trotter_steps: Trotter steps per grid interval.
+    :return: {"times": (T,), <name>: (T,) per observable, "final_state": (2^n,)}
+    """
+    operator = hamiltonian if isinstance(hamiltonian, PauliOperator) else PauliOperator(hamiltonian)
+    psi = np.asarray(initial_state, dtype=complex).copy()
+    if psi.size != operator.dim:
+        raise ValueError("Initial state dimension does not match the Hamiltonian.")
+    if method not in ('krylov', 'expm_multiply', 'trotter'):
+        raise ValueError("method must be 'krylov', 'expm_multiply' or 'trotter'.")
+    times = np.asarray(times, dtype=float)
+    observables = observables or default_observables(operator, psi)
+    records = {name: np.empty(times.size) for name in observables}
+
+    minus_i_h = operator.as_linear_operator(-1j)
+    trace = -1j * operator.trace()
+    for n, t in enumerate(times):
+        if n:
+            dt = t - times[n - 1]
+            if method == 'krylov':
+                psi = lanczos_expm(operator, psi, dt, krylov_dim, tol)
+            elif method == 'expm_multiply':
+                psi = expm_multiply(minus_i_h * dt, psi, traceA=trace * dt)
+            else:
+                for _ in range(trotter_steps):
+                    psi = trotter_step(operator, psi, dt / trotter_steps, trotter_order)
+        for name, observable in observables.items():
+            records[name][n] = observable(psi)
+
+    records['times'] = times
+    records['final_state'] = psi
+    return records
+
+
+if __name__ == "__main__":
+    import time as timer
+
+    # Orch-OR chain as in ibm_vqe_esqet.orch_or_hamiltonian: ZZ chain + g X field + FCU Z string
+    n_qubits, g, fcu_z = 14, 1.0, PHI_GOLDEN * np.pi * 1e-18 * 0.8
+    terms = []
+    for i in range(n_qubits - 1):
+        label = ['I'] * n_qubits
+        label[i] = label[i + 1] = 'Z'
+        terms.append((''.join(label), 1.0))
+    for i in range(n_qubits):
+        label = ['I'] * n_qubits
+        label[i] = 'X'
+        terms.append((''.join(label), g))
+    terms.append(('Z' * n_qubits, fcu_z))
+
+    ghz = np.zeros(2 ** n_qubits, dtype=complex)
+    ghz[0] = ghz[-1] = 1 / np.sqrt(2)
+    times = np.linspace(0, 2.0, 41)
+    for method in ('krylov', 'expm_multiply', 'trotter'):
+        start = timer.perf_counter()
+        run = evolve(terms, ghz, times, method=method, trotter_steps=10, trotter_order=2)
+        print(f"🔹 {method:<13} {timer.perf_counter() - start:6.2f} s | "
+              f"F(t=2) = {run['fidelity'][-1]:.5f}, <Z>(t=2) = {run['magnetization'][-1]:+.5f}, "
+              f"F_QC(t=2) = {run['f_qc'][-1]:.5f}")
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Zero-noise extrapolation (ZNE) for the ESQET omni-kernel, reproducible locally.
+
+omni_kernel_qpu_run.py asks IBM Runtime for `noise_factors` resilience; this
+module does the same thing in the open: it builds gate-folded copies of a
+circuit (G -> G (G^dagger G)^k) at several noise scales, submits every
+(scale, parameter set) combination as a single batched Estimator job and
+extrapolates back to zero noise, vectorized across all parameter sets.
+
+Works with any EstimatorV2 (Aer locally, or a Runtime estimator with its own
+resilience switched off).
+"""
+import time
+import numpy as np
+
+SCALE_FACTORS = (1.0, 3.0, 5.0)
+# Local simulator basis; folded circuits are decomposed at optimization_level=0 so G^dagger G pairs survive
+SIMULATOR_BASIS = ['h', 'x', 'sx', 'rx', 'ry', 'rz', 's', 'sdg', 't', 'tdg', 'cx']
+# Instructions that are never folded (non-unitary or bookkeeping)
+UNFOLDABLE = {'measure', 'barrier', 'reset', 'delay'}
+
+
+# --- 1. Unitary gate folding ---
+def fold_gates(circuit, scale):
+    """
+    Folds gates from the left so the gate count grows by ~`scale`.
+
+    Every foldable gate G becomes G (G^dagger G)^k; the remaining fractional
+    part is spread over the first gates of the circuit. Parameterized gates
+    fold symbolically, so one folded template serves every parameter set.
+
+    :param scale: Target noise scale (>= 1).
+    :return: (folded_circuit, actual_scale)
+    """
+    if scale < 1:
+        raise ValueError("Noise scale factors must be >= 1.")
+    foldable = [i for i, inst in enumerate(circuit.data) if inst.operation.name not in UNFOLDABLE]
+    n_gates = len(foldable)
+    if n_gates == 0:
+        return circuit.copy(), 1.0
+
+    n_folds = int(round(n_gates * (scale - 1) / 2))
+    base_folds, extra = divmod(n_folds, n_gates)
+    folds = dict.fromkeys(foldable, base_folds)
+    for i in foldable[:extra]:
+        folds[i] += 1
+
+    folded = circuit.copy_empty_like()
+    for i, inst in enumerate(circuit.data):
+        folded.append(inst)
+        if folds.get(i):
+            inverse = inst.replace(operation=inst.operation.inverse())
+            for _ in range(folds[i]):
+                folded.append(inverse)
+                folded.append(inst)
+    return folded, (n_gates + 2 * n_folds) / n_gates
+
+
+def folded_circuits(circuit, scale_factors=SCALE_FACTORS):
+    """Folded copies of `circuit` (final measurements removed) and their actual scales."""
+    base = circuit.remove_final_measurements(inplace=False)
+    circuits, scales = [], []
+    for scale in scale_factors:
+        folded, actual = fold_gates(base, scale)
+        circuits.append(folded)
+        scales.append(actual)
+    return circuits, np.array(scales)
+
+
+# --- 2. Vectorized extrapolation (values: (S, P) -> zero-noise (P,)) ---
+def richardson_extrapolate(scales, values):
+    """Lagrange extrapolation through all S points: sum_i y_i prod_{j != i} l_j / (l_j - l_i)."""
+    scales = np.asarray(scales, dtype=float)
+    diffs = scales[None, :] - scales[:, None]
+    np.fill_diagonal(diffs, 1.0)
+    ratios = scales[None, :] / diffs
+    np.fill_diagonal(ratios, 1.0)
+    weights = np.prod(ratios, axis=1)
+    return weights @ np.asarray(values, dtype=float)
+
+
+def polynomial_extrapolate(scales, values, order=1):
+    """Least-squares polynomial of the given order; returns the intercept."""
+    if order >= len(scales):
+        raise ValueError("Polynomial order must be below the number of noise scales.")
+    coeffs = np.polyfit(np.asarray(scales, dtype=float), np.asarray(values, dtype=float), order)
+    return coeffs[-1]
+
+
+def exponential_extrapolate(scales, values, asymptote=0.0):
+    """
+    Fits y = asymptote + A exp(-c l) per column via a log-linear least-squares fit.
+
+    Depolarizing noise drives a traceless observable towards 0, hence the
+    default asymptote. Columns that cross the asymptote fall back to Richardson.
+    """
+    scales = np.asarray(scales, dtype=float)
+    shifted = np.asarray(values, dtype=float) - asymptote
+    signs = np.sign(shifted[0])
+    consistent = np.all(np.sign(shifted) == signs, axis=0) & (signs != 0)
+
+    log_y = np.log(np.abs(np.where(consistent, shifted, 1.0)))
+    x_mean = scales.mean()
+    slope = ((scales - x_mean) @ (log_y - log_y.mean(axis=0))) / np.sum((scales - x_mean) ** 2)
+    intercept = log_y.mean(axis=0) - slope * x_mean
+    mitigated = asymptote + signs * np.exp(intercept)
+    return np.where(consistent, mitigated, richardson_extrapolate(scales, values))
+
+
+EXTRAPOLATORS = {
+    'richardson': richardson_extrapolate,
+    'linear': lambda scales, values: polynomial_extrapolate(scales, values, order=1),
+    'quadratic': lambda scales, values: polynomial_extrapolate(scales, values, order=2),
+    'exponential': exponential_extrapolate,
+}
+
+
+# --- 3. Local noisy estimator ---
+def esqet_noise_model(p1=0.01, p2=0.05):
+    """Depolarizing rates of omni_kernel_sim.get_backend, applied to the decomposed SIMULATOR_BASIS."""
+    from qiskit_aer.noise import NoiseModel, depolarizing_error
+    noise_model = NoiseModel()
+    noise_model.add_all_qubit_quantum_error(depolarizing_error(p1, 1), [g for g in SIMULATOR_BASIS if g != 'cx'])
+    noise_model.add_all_qubit_quantum_error(depolarizing_error(p2, 2), ['cx'])
+    return noise_model
+
+
+def local_estimator(noise_model=None, seed=None):
+    """Aer EstimatorV2 on the density-matrix method, so noisy expectation values are exact."""
+    from qiskit_aer.primitives import EstimatorV2
+    backend_options = {'method': 'density_matrix'}
+    if noise_model is not None:
+        backend_options['noise_model'] = noise_model
+    run_options = {'seed_simulator': seed} if seed is not None else {}
+    return EstimatorV2(options={'backend_options': backend_options, 'run_options': run_options})
+
+
+# --- 4. Batched ZNE run ---
+def run_zne_batch(circuit, observable, parameter_sets, estimator, parameters=None,
+                  scale_factors=SCALE_FACTORS, extrapolation='richardson', pass_manager=None):
+    """
+    Evaluates <observable> at every noise scale for every parameter set in one job.
+
+    :param circuit: Parameterized circuit, e.g. from omni_one_kernel_variational.
+    :param observable: SparsePauliOp on the circuit's qubits.
+    :param parameter_sets: (P, n_params) array; columns follow `parameters` if given.
+    :param estimator: Any EstimatorV2; see `local_estimator`.
+    :param parameters: Parameter order of `parameter_sets` (defaults to circuit.parameters).
+    :param pass_manager: Optional ISA pass manager for hardware; it must not cancel
+        inverse pairs. Defaults to decomposing into SIMULATOR_BASIS unoptimized.
+    :return: {"scales": (S,), "noisy": (S, P), "mitigated": (P,), "elapsed_s": float}
+    """
+    if extrapolation not in EXTRAPOLATORS:
+        raise ValueError(f"extrapolation must be one of {sorted(EXTRAPOLATORS)}.")
+    parameter_sets = np.atleast_2d(np.asarray(parameter_sets, dtype=float))
+    circuits, scales = folded_circuits(circuit, scale_factors)
+    if pass_manager is not None:
+        circuits = pass_manager.run(circuits)
+    else:
+        from qiskit import transpile
+        circuits = transpile(circuits, basis_gates=SIMULATOR_BASIS, optimization_level=0)
+
+    # Estimator pubs expect columns in circuit.parameters order
+    if parameters is not None:
+        order = [list(parameters).index(p) for p in circuits[0].parameters]
+        parameter_sets = parameter_sets[:, order]
+
+    start = time.perf_counter()
+    pubs = [(qc, observable, parameter_sets) for qc in circuits]
+    result = estimator.run(pubs).result()
+    noisy = np.array([np.asarray(pub_result.data.evs).reshape(-1) for pub_result in result])
+    elapsed = time.perf_counter() - start
+
+    return {
+        'scales': scales,
+        'noisy': noisy,
+        'mitigated': EXTRAPOLATORS[extrapolation](scales, noisy),
+        'elapsed_s': elapsed,
+    }
+
+
+if __name__ == "__main__":
+    from qiskit.quantum_info import SparsePauliOp
+    from omni_kernel_ansatz import omni_kernel_ansatz
+
+    n_qubits, n_sets = 5, 64
+    circuit, params = omni_kernel_ansatz(n_qubits=n_qubits, layers=2)
+    H = SparsePauliOp.from_list([('IIIIZ', 1.0), ('IIZII', -0.5), ('IZIZI', 0.2),
+                                 ('ZIIII', 0.1), ('ZZZII', -0.9), ('XXXXX', 0.05)])
+    parameter_sets = np.random.default_rng(0).uniform(-np.pi, np.pi, (n_sets, len(params)))
+
+    ideal = run_zne_batch(circuit, H, parameter_sets, local_estimator(), params, scale_factors=(1.0,))
+    zne = run_zne_batch(circuit, H, parameter_sets, local_estimator(esqet_noise_model()), params)
+
+    raw_err = np.abs(zne['noisy'][0] - ideal['noisy'][0]).mean()
+    for name, extrapolate in EXTRAPOLATORS.items():
+        err = np.abs(extrapolate(zne['scales'], zne['noisy']) - ideal['noisy'][0]).mean()
+        print(f"🔹 {name:<12} mean |E - E_ideal| = {err:.4f} (unmitigated {raw_err:.4f})")
+    print(f"🔹 Scales {zne['scales']} x {n_sets} parameter sets in one job: {zne['elapsed_s']:.2f} s")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Compiled NumPy kernels generated from the symbolic ESQET equations.
+
+sympy_esqet_solver.py defines F_QC and the ESQET-modified Schrödinger,
+Klein-Gordon and Dirac expressions. This module simplifies the scalar
+coefficients of those equations, runs common-subexpression elimination and
+writes them out as plain vectorized NumPy functions. The generated module is
+cached on disk under a hash of the solver source, so later runs import it
+directly, without sympy or simplify(), and evaluate F_QC on 1e7-point grids.
+
+    kernels = load_kernels()
+    F = kernels.F_QC(delta=0.39, D_ent=D_grid, D_obs=0.8, ...)
+"""
+import hashlib
+import importlib.util
+import os
+import re
+import sys
+import time
+
+CODEGEN_VERSION = 1
+SOLVER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sympy_esqet_solver.py')
+CACHE_DIR = os.environ.get(
+    'ESQET_KERNEL_CACHE', os.path.join(os.path.dirname(os.path.abspath(__file__)), '__kernelcache__'))
+
+# Kernel name -> scalar coefficient it extracts from the solver's expressions
+KERNELS = {
+    'FCU': 'FCU coherence unit phi*pi*delta',
+    'F_QC': 'Full Quantum Coherence Function F_QC (v3.1)',
+    'kinetic_coefficient': 'Schrödinger kinetic prefactor -(hbar^2 F_QC)/(2m) multiplying d^2 psi/dr^2',
+    'potential_scale': 'Schrödinger potential scaling (V + V_QC)/V',
+    'klein_gordon_mass_squared': 'Klein-Gordon mass term (m c/hbar)^2 (1 - FCU D_ent/rho_vac)',
+    'dirac_momentum_scale': 'Dirac momentum scaling c F_QC multiplying alpha.p',
+    'dirac_mass_scale': 'Dirac mass scaling (1 - FCU D_ent/E_spin) multiplying beta m c^2',
+}
+
+# Preferred positional order of kernel arguments (keyword calls are recommended)
+ARG_ORDER = ['delta', 'D_ent', 'D_obs', 'I_0', 'k_B', 'T_vac', 'Gamma_total', 'phi_res', 'k_vec',
+             'lambda_c', 'Delta_phi_obs', 'hbar', 'omega_vac', 'm', 'c', 'rho_vac', 'E_spin']
+
+
+def _source_hash():
+    """Cache key: solver source + codegen version + kernel spec (no sympy import needed)."""
+    digest = hashlib.sha256()
+    with open(SOLVER_PATH, 'rb') as f:
+        digest.update(f.read())
+    digest.update(repr((CODEGEN_VERSION, sorted(KERNELS))).encode())
+    return digest.hexdigest()[:16]
+
+
+def _import_solver():
+    """Imports sympy_esqet_solver from this directory (slow: pulls in sympy)."""
+    sys.path.insert(0, os.path.dirname(SOLVER_PATH))
+    try:
+        import sympy_esqet_solver
+    finally:
+        sys.path.pop(0)
+    return sympy_esqet_solver
+
+
+def symbolic_kernels():
+    """Simplified sympy expressions for every entry of KERNELS."""
+    from sympy import Derivative, simplify
+    solver = _import_solver()
+    exprs = {
+        'FCU': solver.FCU_term,
+        'F_QC': solver.F_QC,
+        'kinetic_coefficient': solver.Kinetic_ESQET.subs(Derivative(solver.psi, solver.r, 2), 1),
+        'potential_scale': (solver.V_r + solver.V_QC) / solver.V_r,
+        'klein_gordon_mass_squared': solver.Mass_Term / solver.psi,
+        'dirac_momentum_scale': solver.Momentum_ESQET / solver.alpha_p,
+        'dirac_mass_scale': solver.Mass_ESQET / solver.beta_mc2,
+    }
+    return solver, {name: simplify(expr) for name, expr in exprs.items()}
+
+
+def _argument_names(solver, symbols):
+    """Python identifiers for solver symbols: the variable they are bound to, else a sanitized name."""
+    bound = {}
+    for name, value in vars(solver).items():
+        if not name.startswith('_') and getattr(value, 'is_Symbol', False):
+            bound.setdefault(value, name)
+    names = {}
+    for sym in symbols:
+        names[sym] = bound.get(sym) or re.sub(r'\W', '_', re.sub(r'[\\{}]', '', str(sym)))
+    rank = {name: i for i, name in enumerate(ARG_ORDER)}
+    return sorted(symbols, key=lambda s: (rank.get(names[s], len(rank)), names[s])), names
+
+
+def generate_source():
+    """Generates the kernel module source (CSE'd NumPy code) and its expression hash."""
+    from sympy import Symbol, cse, srepr
+    from sympy.printing.numpy import NumPyPrinter
+
+    solver, exprs = symbolic_kernels()
+    expression_hash = hashlib.sha256(''.join(srepr(e) for e in exprs.values()).encode()).hexdigest()[:16]
+    printer = NumPyPrinter({'fully_qualified_modules': True})
+
+    lines = [
+        '# Auto-generated by esqet_codegen.py from sympy_esqet_solver.py -- do not edit.',
+        'import numpy',
+        '',
+        f'EXPRESSION_HASH = {expression_hash!r}',
+        'KERNEL_ARGS = {}',
+    ]
+    for name, expr in exprs.items():
+        ordered, names = _argument_names(solver, expr.free_symbols)
+        # Rename symbols to their Python identifiers before CSE so temporaries print cleanly
+        expr = expr.xreplace({s: Symbol(names[s]) for s in ordered})
+        replacements, (reduced,) = cse(expr, optimizations='basic')
+        args = [names[s] for s in ordered]
+        lines += ['', '', f'def {name}({", ".join(args)}):', f'    """{KERNELS[name]}."""']
+        lines += [f'    {sym} = {printer.doprint(sub)}' for sym, sub in replacements]
+        lines += [f'    return {printer.doprint(reduced)}', '', f'KERNEL_ARGS[{name!r}] = {tuple(args)!r}']
+    return '\n'.join(lines) + '\n', expression_hash
+
+
+def kernel_path():
+    return os.path.join(CACHE_DIR, f'esqet_kernels_{_source_hash()}.py')
+
+
+def build_kernels(force=False):
+    """Writes the generated module to the cache (atomically) unless it is already there."""
+    path = kernel_path()
+    if force or not os.path.exists(path):
+        source, _ = generate_source()
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(source)
+        os.replace(tmp_path, path)
+    return path
+
+
+def load_kernels(rebuild=False):
+    """Imports the cached kernel module, generating it first on a cache miss."""
+    path = build_kernels(force=rebuild)
+    spec = importlib.util.spec_from_file_location('esqet_kernels', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+if __name__ == "__main__":
+    import numpy as np
+
+    start = time.perf_counter()
+    cached = os.path.exists(kernel_path())
+    kernels = load_kernels()
+    print(f"🔹 Kernels {'loaded from cache' if cached else 'generated'} in {time.perf_counter() - start:.2f} s "
+          f"({kernel_path()})")
+    print(f"🔹 F_QC arguments: {kernels.KERNEL_ARGS['F_QC']}")
+
+    n_points = 10_000_000
+    D_ent = np.linspace(0.0, 1.0, n_points)
+    start = time.perf_counter()
+    F = kernels.F_QC(delta=0.390305, D_ent=D_ent, D_obs=0.8, I_0=1.0, k_B=1.0, T_vac=1.0, Gamma_total=0.1,
+                     phi_res=1.0, k_vec=1.0, lambda_c=1.0, Delta_phi_obs=0.0)
+    print(f"🔹 F_QC on {n_points:.0e} points in {time.perf_counter() - start:.3f} s "
+          f"(range {F.min():.3f} .. {F.max():.3f})")
@@ -1,4 +1,4 @@
-from sympy import symbols, Function, Eq, simplify, Derivative, pi, sqrt, I
+from sympy import symbols, Symbol, Function, Eq, simplify, Derivative, pi, sqrt, I
 from sympy.functions.elementary.trigonometric import cos
 
 # --- 1. Define Symbols and Constants ---
@@ -28,11 +28,7 @@ F_QC_main = (1 + FCU_term * (D_ent + D_obs) * I_0 / (k_B * T_vac))
 F_QC_cos = (1 + Gamma_total) * (1 + cos(2 * phi_res * pi / (k_vec * lambda_c) + Delta_phi_obs))
 F_QC = F_QC_main * F_QC_cos
 
-print(f"FCU Term (Approximate Value): {FCU_term_approx.evalf()}")
-print("\n--- ESQET-Modified Wave Equations (Symbolic) ---")
-
 # --- 2. ESQET-Modified Schrödinger Equation ---
-print("\n### 1. Modified Schrödinger Equation (Time-Dependent) ###")
 # Kinetic term scaling (using the second derivative w.r.t 'r' for spatial part)
 Kinetic_ESQET = -(hbar**2 * F_QC) / (2 * m) * Derivative(psi, r, 2)
 # Coherence Potential Term
@@ -42,12 +38,8 @@ H_ESQET = Kinetic_ESQET + V_r + V_QC
 
 # Fix: NameError corrected by importing 'I' (imaginary unit)
 Schrodinger_ESQET = Eq(I * hbar * Derivative(psi, t), H_ESQET)
-print("\nTime-Dependent Form:")
-# Simplify for cleaner output, but retain derivatives
-print(simplify(Schrodinger_ESQET))
 
 # --- 3. ESQET-Modified Klein-Gordon Equation ---
-print("\n### 2. Modified Klein-Gordon Equation (Relativistic Scalar) ###")
 
 # Operator Scaling (D'Alembertian scaled by F_QC)
 D_Alembertian = F_QC * (1/c**2 * Derivative(psi, t, 2) - Derivative(psi, r, 2))
@@ -56,26 +48,41 @@ Mass_Damping = 1 - FCU_term * D_ent / rho_vac
 Mass_Term = (m**2 * c**2 / hbar**2) * Mass_Damping * psi
 
 KleinGordon_ESQET = Eq(D_Alembertian + Mass_Term, 0)
-print("\nRelativistic Scalar Form:")
-print(simplify(KleinGordon_ESQET))
 
 # --- 4. ESQET-Modified Dirac Equation (Simplified Mass/Momentum Terms) ---
 # Note: Full Dirac involves matrices, so we only model the scalar scaling terms here.
-print("\n### 3. Modified Dirac Equation (Conceptual Scaling) ###")
 # Define conceptual matrix operators
-alpha_p = symbols(r'\boldsymbol{\alpha} \cdot \mathbf{p}') # Term for c*alpha*p
-beta_mc2 = symbols(r'\beta m c^2') # Term for beta*m*c^2
+# Fix: Symbol (not symbols) so names containing spaces stay single symbols
+alpha_p = Symbol(r'\boldsymbol{\alpha} \cdot \mathbf{p}') # Term for c*alpha*p
+beta_mc2 = Symbol(r'\beta m c^2') # Term for beta*m*c^2
 gamma_5 = symbols(r'\gamma^5')
 J_QC = symbols(r'J_{QC}')
 
 # Momentum Term Scaling
 Momentum_ESQET = c * alpha_p * F_QC
 # Mass Term Scaling
-Mass_ESQET = beta_mc2 * (1 - FCU_term * D_ent / symbols('E_{spin}'))
+E_spin = symbols('E_{spin}')
+Mass_ESQET = beta_mc2 * (1 - FCU_term * D_ent / E_spin)
 # Coherence Current Term
 Coherence_Current = gamma_5 * J_QC
 
 Dirac_ESQET_Conceptual = Eq(I * hbar * Derivative(psi, t), Momentum_ESQET + Mass_ESQET + Coherence_Current)
-print("\nRelativistic Spinor Form (Conceptual):")
-print(simplify(Dirac_ESQET_Conceptual))
+
+# Numeric kernels for these expressions are generated and cached by esqet_codegen.py
+if __name__ == "__main__":
+    print(f"FCU Term (Approximate Value): {FCU_term_approx.evalf()}")
+    print("\n--- ESQET-Modified Wave Equations (Symbolic) ---")
+
+    print("\n### 1. Modified Schrödinger Equation (Time-Dependent) ###")
+    print("\nTime-Dependent Form:")
+    # Simplify for cleaner output, but retain derivatives
+    print(simplify(Schrodinger_ESQET))
+
+    print("\n### 2. Modified Klein-Gordon Equation (Relativistic Scalar) ###")
+    print("\nRelativistic Scalar Form:")
+    print(simplify(KleinGordon_ESQET))
+
+    print("\n### 3. Modified Dirac Equation (Conceptual Scaling) ###")
+    print("\nRelativistic Spinor Form (Conceptual):")
+    print(simplify(Dirac_ESQET_Conceptual))
 
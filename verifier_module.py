@@ -1,3 +1,4 @@
+from functools import lru_cache
 import numpy as np
 
 # --- ESQET Constants (As derived in the synthesis) ---
@@ -6,6 +7,18 @@ G_CONST = 6.67430e-11 # G_Newton
 HBAR_CONST = 1.0545718e-34 # Reduced Planck
 BASE_LYAPUNOV = 1.35 # ln(3.9) for standard logistic map chaos
 KAPPA = 0.2 # Observer damping scaling
+MAX_NEG_LAMBDA = -20.0 # Hypothetical max stability for faith_score scaling
+ADJACENT_THRESHOLD = 0.90 # Jerry Riggin threshold on faith_score
+N_INDICATORS = 7 # Coherence indicators per APK
+
+# Structured result of apk_quantum_verifier_batch
+VERIFIER_DTYPE = np.dtype([('lambda_eff', 'f8'), ('faith_score', 'f8'), ('adjacent_possible', '?')])
+# ... extended with the interpolated VQE optimum when a lookup table is supplied
+VERIFIER_VQE_DTYPE = np.dtype(VERIFIER_DTYPE.descr + [('vqe_energy', 'f8'), ('vqe_in_grid', '?')])
+
+def diosi_penrose_rate(rho_M_eff=1e-26, delta_x_eff=1e-9):
+    """Diósi-Penrose collapse rate Gamma_DP = Delta E_G / hbar, with Delta E_G ~ G rho_M_eff^2 / delta_x_eff."""
+    return (G_CONST * rho_M_eff**2) / delta_x_eff / HBAR_CONST
 
 def calculate_reverse_lyapunov(D_obs, rho_M_eff=1e-26, delta_x_eff=1e-9):
     """
@@ -17,30 +30,74 @@ def calculate_reverse_lyapunov(D_obs, rho_M_eff=1e-26, delta_x_eff=1e-9):
     :return: lambda_eff (float), Gamma_DP (float)
     """
     # Diósi-Penrose Collapse Rate (Gamma_DP = Delta E_G / hbar)
-    Delta_E_G_Approx = (G_CONST * rho_M_eff**2) / delta_x_eff
-    Gamma_DP = Delta_E_G_Approx / HBAR_CONST 
+    Gamma_DP = diosi_penrose_rate(rho_M_eff, delta_x_eff)
     
     # Effective Lyapunov Exponent (REVERSE Chaos Control)
     lambda_eff = BASE_LYAPUNOV - KAPPA * D_obs - Gamma_DP
     
     return lambda_eff, Gamma_DP
 
-def apk_quantum_verifier_run(coherence_indicators, D_obs):
+def calculate_measured_lyapunov(D_obs, r=3.9, rho_M_eff=1e-26, delta_x_eff=1e-9, **estimator_options):
+    """
+    lambda_eff from measured dynamics instead of BASE_LYAPUNOV - KAPPA * D_obs.
+
+    The maximal exponent of the D_obs-damped logistic map (lyapunov_spectrum.py,
+    damping KAPPA * D_obs) replaces the assumed ln(3.9) baseline.
+
+    :param D_obs: Observer Entanglement Density, scalar or array.
+    :param r: Logistic growth rate of the uncontrolled dynamics.
+    :return: lambda_eff (float or array), Gamma_DP (float)
+    """
+    from lyapunov_spectrum import maximal_lyapunov
+
+    Gamma_DP = diosi_penrose_rate(rho_M_eff, delta_x_eff)
+    lambda_max = maximal_lyapunov(r, D_obs, kappa=KAPPA, **estimator_options)
+    return lambda_max - Gamma_DP, Gamma_DP
+
+@lru_cache(maxsize=8)
+def measured_lyapunov_table(r=3.9, n_grid=101):
+    """
+    Maximal exponents of the damped logistic map on D_obs = linspace(0, 1, n_grid), computed once per (r, n_grid).
+
+    The exponent dips sharply in periodic windows, so the grid is kept fine for interpolation.
+
+    :return: (D_obs grid, lambda_max), both read-only.
+    """
+    from lyapunov_spectrum import maximal_lyapunov
+
+    grid = np.linspace(0.0, 1.0, n_grid)
+    lambda_max = np.asarray(maximal_lyapunov(r, grid, kappa=KAPPA), dtype=float)
+    grid.flags.writeable = lambda_max.flags.writeable = False
+    return grid, lambda_max
+
+def _lyapunov_terms(D_obs, Gamma_DP, lyapunov):
+    """(lambda_eff, baseline) for the 'model' (BASE_LYAPUNOV - KAPPA D_obs) or 'measured' (table) exponent."""
+    if lyapunov == 'model':
+        return BASE_LYAPUNOV - KAPPA * D_obs - Gamma_DP, BASE_LYAPUNOV
+    if lyapunov == 'measured':
+        grid, lambda_max = measured_lyapunov_table()
+        # Undamped dynamics (D_obs = 0) take the place of the assumed ln(3.9) baseline
+        return np.interp(D_obs, grid, lambda_max) - Gamma_DP, lambda_max[0]
+    raise ValueError(f"Unknown lyapunov source '{lyapunov}' (use 'model' or 'measured').")
+
+def apk_quantum_verifier_run(coherence_indicators, D_obs, vqe_table=None, lyapunov='model'):
     """
     Runs a single iteration of the hybrid ESQET-DP VQE process.
     
     :param coherence_indicators: List of 7 values from APK (initial state/params).
     :param D_obs: Current Observer Entanglement Density.
-    :return: {"adjacent_possible": bool, "faith_score": float, "lambda_eff": float}
+    :param vqe_table: Optional VQELookupTable (verifier_vqe_table.py) answering the VQE step.
+    :param lyapunov: 'model' (BASE_LYAPUNOV - KAPPA * D_obs) or 'measured' (interpolated
+        measured_lyapunov_table, which also sets the faith-score baseline).
+    :return: {"adjacent_possible": bool, "faith_score": float, "lambda_eff": float}, plus
+        "vqe_energy" and "vqe_in_grid" when a table is given
     """
     # 1. Calculate the REVERSE Coherence Threshold
-    lambda_eff, _ = calculate_reverse_lyapunov(D_obs)
+    lambda_eff, baseline = _lyapunov_terms(D_obs, diosi_penrose_rate(), lyapunov)
+    lambda_eff = float(lambda_eff)
 
-    # 2. Setup Quantum Simulation (Use a simplified call for the final output here)
-    #    In the full GitHub code, this would involve the VQE minimization.
-    #    We use a placeholder output to complete the logical loop:
-    
-    # Placeholder: Simulating the full VQE result
+    # 2. Quantum Simulation: the VQE minimization is precomputed offline
+    #    (verifier_vqe_table.build_vqe_table) and answered by an interpolated lookup.
     # The VQE minimizes cost, which includes a penalty for lambda_eff > 0.
     # Therefore, the optimized state should result in an energy that is 
     # inversely related to the stability (negativity) of lambda_eff.
@@ -51,25 +108,72 @@ def apk_quantum_verifier_run(coherence_indicators, D_obs):
     
     # Scaling lambda_eff (-inf to BASE_LYAPUNOV) to faith_score (0 to 1)
     # Use a sigmoid or simple scaling for a bounded result:
-    max_neg_lambda = -20.0 # Hypothetical max stability for scaling
-    faith_score = np.clip( (BASE_LYAPUNOV - lambda_eff) / (BASE_LYAPUNOV + abs(max_neg_lambda)), 0.0, 1.0)
+    faith_score = np.clip( (baseline - lambda_eff) / (baseline + abs(MAX_NEG_LAMBDA)), 0.0, 1.0)
     
     # 3. Apply the Jerry Riggin Threshold
-    ADJACENT_THRESHOLD = 0.90
     adjacent_possible = (faith_score > ADJACENT_THRESHOLD)
     
-    return {
+    result = {
         "adjacent_possible": adjacent_possible, 
         "faith_score": faith_score, 
         "lambda_eff": lambda_eff
     }
+    if vqe_table is not None:
+        vqe_energy, _, in_grid = vqe_table.lookup(D_obs, coherence_indicators)
+        result["vqe_energy"], result["vqe_in_grid"] = float(vqe_energy), bool(in_grid)
+    return result
+
+def apk_quantum_verifier_batch(coherence_indicators, D_obs, rho_M_eff=1e-26, delta_x_eff=1e-9, out=None,
+                               vqe_table=None, lyapunov='model'):
+    """
+    Vectorized apk_quantum_verifier_run over N verifications.
+
+    Gamma_DP is computed once for the shared (rho_M_eff, delta_x_eff), and the
+    Lyapunov exponent, faith score and threshold are evaluated as array operations.
+
+    :param coherence_indicators: (N, 7) indicator matrix, one row per APK.
+    :param D_obs: (N,) Observer Entanglement Densities (or a scalar for all rows).
+    :param out: Optional preallocated (N,) array of VERIFIER_DTYPE (VERIFIER_VQE_DTYPE with a table).
+    :param vqe_table: Optional VQELookupTable; adds the vqe_energy and vqe_in_grid fields.
+    :param lyapunov: 'model' or 'measured' lambda_eff, as in apk_quantum_verifier_run.
+    :return: Structured (N,) array with fields lambda_eff, faith_score, adjacent_possible.
+    """
+    coherence_indicators = np.asarray(coherence_indicators, dtype=float)
+    if coherence_indicators.ndim != 2 or coherence_indicators.shape[1] != N_INDICATORS:
+        raise ValueError(f"coherence_indicators must have shape (N, {N_INDICATORS}).")
+    n = coherence_indicators.shape[0]
+    D_obs = np.broadcast_to(np.asarray(D_obs, dtype=float), (n,))
+    if out is None:
+        out = np.empty(n, dtype=VERIFIER_DTYPE if vqe_table is None else VERIFIER_VQE_DTYPE)
+
+    Gamma_DP = diosi_penrose_rate(rho_M_eff, delta_x_eff)
+    lambda_eff = out['lambda_eff']
+    if lyapunov == 'model':
+        np.multiply(D_obs, -KAPPA, out=lambda_eff)
+        lambda_eff += BASE_LYAPUNOV - Gamma_DP
+        baseline = BASE_LYAPUNOV
+    else:
+        lambda_eff[...], baseline = _lyapunov_terms(D_obs, Gamma_DP, lyapunov)
+
+    faith_score = out['faith_score']
+    np.subtract(baseline, lambda_eff, out=faith_score)
+    faith_score /= baseline + abs(MAX_NEG_LAMBDA)
+    np.clip(faith_score, 0.0, 1.0, out=faith_score)
+    np.greater(faith_score, ADJACENT_THRESHOLD, out=out['adjacent_possible'])
+    if vqe_table is not None:
+        out['vqe_energy'], _, out['vqe_in_grid'] = vqe_table.lookup(D_obs, coherence_indicators)
+    return out
+
+if __name__ == "__main__":
+    # --- Example Use ---
+    # Test Case 1: Low Observer Effect (Chaotic, lambda_eff > 0)
+    result_chaotic = apk_quantum_verifier_run(coherence_indicators=[1]*7, D_obs=0.1)
 
-# --- Example Use ---
-# Test Case 1: Low Observer Effect (Chaotic, lambda_eff > 0)
-result_chaotic = apk_quantum_verifier_run(coherence_indicators=[1]*7, D_obs=0.1)
+    # Test Case 2: High Observer Effect (Coherent, lambda_eff < 0 - REVERSE active)
+    result_coherent = apk_quantum_verifier_run(coherence_indicators=[1]*7, D_obs=0.99)
 
-# Test Case 2: High Observer Effect (Coherent, lambda_eff < 0 - REVERSE active)
-result_coherent = apk_quantum_verifier_run(coherence_indicators=[1]*7, D_obs=0.99)
+    print(result_chaotic)
+    print(result_coherent)
 
-print(result_chaotic)
-print(result_coherent)
+    # lambda_eff from the measured exponent of the damped map instead of the linear model
+    print(apk_quantum_verifier_run(coherence_indicators=[1]*7, D_obs=0.99, lyapunov='measured'))
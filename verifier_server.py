@@ -0,0 +1,227 @@
+"""
+Micro-batching asyncio server for the APK quantum verifier.
+
+Clients send one JSON object per line over TCP or a Unix socket:
+
+    {"coherence_indicators": [7 values], "D_obs": 0.8}
+
+and receive one JSON line back (the fields of apk_quantum_verifier_run, plus
+vqe_energy / vqe_in_grid when the server holds a VQE lookup table). The line
+{"metrics": true} returns the server's latency and throughput counters.
+
+Requests arriving within `window` seconds of the first queued one (up to
+`max_batch`) are scored together with apk_quantum_verifier_batch. run_load is
+a load generator: many concurrent connections, each sending requests back to
+back, with client-side p50/p99 latencies and throughput.
+
+    python verifier_server.py                     # local batching benchmark
+    python verifier_server.py serve /tmp/apk.sock # serve on a Unix socket
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+from verifier_module import N_INDICATORS, apk_quantum_verifier_batch
+
+
+# --- 1. Latency metrics ---
+class LatencyMetrics:
+    """Request/batch counters and a ring buffer of the last `window` request latencies."""
+
+    def __init__(self, window=100_000):
+        self.latencies = np.zeros(window)
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+
+    def record_batch(self, latencies):
+        n = len(latencies)
+        index = (self.requests + np.arange(n)) % self.latencies.size
+        self.latencies[index] = latencies
+        self.requests += n
+        self.batches += 1
+
+    def snapshot(self):
+        recent = self.latencies[:min(self.requests, self.latencies.size)]
+        elapsed = time.perf_counter() - self.started
+        p50, p99 = np.percentile(recent, [50, 99]) if recent.size else (0.0, 0.0)
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "errors": self.errors,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "p50_ms": 1e3 * float(p50),
+            "p99_ms": 1e3 * float(p99),
+            "throughput_rps": self.requests / elapsed if elapsed > 0 else 0.0,
+        }
+
+
+# --- 2. Micro-batcher ---
+class MicroBatcher:
+    """Collects concurrent verifications and scores them as one vectorized batch."""
+
+    def __init__(self, window=0.002, max_batch=1024, vqe_table=None, metrics=None):
+        self.window, self.max_batch, self.vqe_table = window, max_batch, vqe_table
+        self.metrics = LatencyMetrics() if metrics is None else metrics
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def verify(self, coherence_indicators, D_obs):
+        """Queues one verification and waits for its batch to be scored."""
+        indicators = np.asarray(coherence_indicators, dtype=float)
+        if indicators.shape != (N_INDICATORS,):
+            raise ValueError(f"coherence_indicators must have {N_INDICATORS} values.")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((indicators, float(D_obs), time.perf_counter(), future))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            await asyncio.sleep(self.window)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            indicators, D_obs, submitted, futures = zip(*batch)
+            try:
+                results = apk_quantum_verifier_batch(np.stack(indicators), np.array(D_obs),
+                                                     vqe_table=self.vqe_table)
+            except Exception as error:
+                # Fail this batch only; the batcher keeps serving later requests
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            fields = results.dtype.names
+            for future, row in zip(futures, results.tolist()):
+                if not future.done():
+                    future.set_result(dict(zip(fields, row)))
+            self.metrics.record_batch(time.perf_counter() - np.array(submitted))
+
+
+# --- 3. Server ---
+async def _handle_connection(batcher, reader, writer):
+    try:
+        while line := await reader.readline():
+            try:
+                request = json.loads(line)
+                if request.get("metrics"):
+                    response = batcher.metrics.snapshot()
+                else:
+                    response = await batcher.verify(request["coherence_indicators"], request["D_obs"])
+            except Exception as error:  # Malformed request or a failed batch
+                batcher.metrics.errors += 1
+                response = {"error": str(error)}
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(host="127.0.0.1", port=8765, path=None, window=0.002, max_batch=1024, vqe_table=None):
+    """
+    Starts the verifier service (Unix socket if `path` is given, TCP otherwise).
+
+    :return: (asyncio server, MicroBatcher); close the server and await batcher.stop() to shut down.
+    """
+    batcher = MicroBatcher(window, max_batch, vqe_table)
+    batcher.start()
+
+    def handler(reader, writer):
+        return _handle_connection(batcher, reader, writer)
+
+    if path:
+        server = await asyncio.start_unix_server(handler, path=path)
+    else:
+        server = await asyncio.start_server(handler, host, port)
+    return server, batcher
+
+
+async def serve(host="127.0.0.1", port=8765, path=None, window=0.002, max_batch=1024, vqe_table=None):
+    server, _ = await start_server(host, port, path, window, max_batch, vqe_table)
+    async with server:
+        await server.serve_forever()
+
+
+# --- 4. Load generator ---
+async def _open(host, port, path):
+    if path:
+        return await asyncio.open_unix_connection(path)
+    return await asyncio.open_connection(host, port)
+
+
+async def request_metrics(host="127.0.0.1", port=8765, path=None):
+    reader, writer = await _open(host, port, path)
+    writer.write(b'{"metrics": true}\n')
+    await writer.drain()
+    metrics = json.loads(await reader.readline())
+    writer.close()
+    return metrics
+
+
+async def run_load(n_clients=64, requests_per_client=200, host="127.0.0.1", port=8765, path=None, seed=0):
+    """
+    Drives the server with `n_clients` concurrent connections sending random verifications.
+
+    :return: {"requests", "seconds", "throughput_rps", "p50_ms", "p99_ms"} measured client-side.
+    """
+    rng = np.random.default_rng(seed)
+    payloads = [json.dumps({"coherence_indicators": row[:N_INDICATORS].tolist(), "D_obs": row[-1]}).encode() + b"\n"
+                for row in rng.uniform(0, 1, (n_clients * requests_per_client, N_INDICATORS + 1))]
+    latencies = np.empty(len(payloads))
+
+    async def client(k):
+        reader, writer = await _open(host, port, path)
+        for i in range(k * requests_per_client, (k + 1) * requests_per_client):
+            start = time.perf_counter()
+            writer.write(payloads[i])
+            await writer.drain()
+            await reader.readline()
+            latencies[i] = time.perf_counter() - start
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(k) for k in range(n_clients)))
+    elapsed = time.perf_counter() - start
+    p50, p99 = np.percentile(latencies, [50, 99])
+    return {"requests": len(payloads), "seconds": elapsed, "throughput_rps": len(payloads) / elapsed,
+            "p50_ms": 1e3 * float(p50), "p99_ms": 1e3 * float(p99)}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        socket_path = sys.argv[2] if len(sys.argv) > 2 else None
+        asyncio.run(serve(path=socket_path))
+        sys.exit()
+
+    async def benchmark(window, max_batch):
+        path = os.path.join(tempfile.mkdtemp(), "apk.sock")
+        server, batcher = await start_server(path=path, window=window, max_batch=max_batch)
+        client = await run_load(n_clients=64, requests_per_client=100, path=path)
+        metrics = await request_metrics(path=path)
+        server.close()
+        await server.wait_closed()
+        await batcher.stop()
+        os.remove(path)
+        return client, metrics
+
+    for window, max_batch in [(0.0, 1), (0.0, 1024), (0.002, 1024)]:
+        client, metrics = asyncio.run(benchmark(window, max_batch))
+        print(f"🔹 window {window * 1e3:.0f} ms, max batch {max_batch:4d}: "
+              f"{client['throughput_rps']:7.0f} req/s, p50 {client['p50_ms']:.2f} ms, p99 {client['p99_ms']:.2f} ms "
+              f"(mean batch {metrics['mean_batch_size']:.1f})")
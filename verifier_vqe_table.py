@@ -0,0 +1,164 @@
+"""
+Precomputed ESQET VQE lookup table for the APK verifier.
+
+Running the VQE per verification takes seconds, so it is run offline instead:
+build_vqe_table sweeps a grid of observer densities D_obs and coherence
+buckets (the mean of the 7 coherence indicators), minimizes the omni-kernel
+ansatz against verifier_hamiltonian at every node (warm-started from the
+previous node), and stores the optimal energies and parameters in one .npz.
+At verification time VQELookupTable answers with bilinear interpolation and
+flags queries that fall outside the precomputed grid.
+
+    table = build_vqe_table('vqe_table.npz')            # offline, once
+    table = VQELookupTable.load('vqe_table.npz')         # verifier start-up
+    energy, params, in_grid = table.lookup(D_obs, coherence_indicators)
+"""
+import json
+import os
+import sys
+import time
+import numpy as np
+
+PHI = (1 + np.sqrt(5)) / 2
+DELTA_FCU = 0.390305  # delta_val of sympy_esqet_solver.py
+TABLE_VERSION = 1
+
+
+def coherence_level(coherence_indicators):
+    """Coherence bucket coordinate: mean of the 7 APK indicators (last axis)."""
+    return np.mean(np.asarray(coherence_indicators, dtype=float), axis=-1)
+
+
+# --- 1. Offline build ---
+def verifier_hamiltonian(D_obs, coherence, n_qubits=5):
+    """Orch-OR chain with a decoherence field (1 - coherence) X and the FCU Z string scaled by D_obs."""
+    from qiskit.quantum_info import SparsePauliOp
+    terms = []
+    for i in range(n_qubits - 1):
+        label = ['I'] * n_qubits
+        label[i] = label[i + 1] = 'Z'
+        terms.append((''.join(label), 1.0))
+    for i in range(n_qubits):
+        label = ['I'] * n_qubits
+        label[i] = 'X'
+        terms.append((''.join(label), 1.0 - coherence))
+    terms.append(('Z' * n_qubits, PHI * np.pi * DELTA_FCU * D_obs))
+    return SparsePauliOp.from_list(terms)
+
+
+def _omni_kernel_ansatz(n_qubits, layers):
+    """The variational circuit of simulations/code/omni_kernel_ansatz.py."""
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'simulations', 'code'))
+    try:
+        from omni_kernel_ansatz import omni_kernel_ansatz
+    finally:
+        sys.path.pop(0)
+    return omni_kernel_ansatz(n_qubits=n_qubits, layers=layers)
+
+
+def build_vqe_table(path=None, D_obs_grid=np.linspace(0.0, 1.0, 11), coherence_grid=np.linspace(0.0, 1.0, 11),
+                    n_qubits=5, layers=1, maxiter=300, seed=0):
+    """
+    Runs the ESQET VQE on every (D_obs, coherence) node and optionally saves the table.
+
+    Nodes are visited in a serpentine order and each optimization starts from the
+    previous optimum, which keeps the energy surface smooth for interpolation.
+    """
+    from qiskit.quantum_info import Statevector
+    from scipy.optimize import minimize
+
+    circuit, parameters = _omni_kernel_ansatz(n_qubits, layers)
+    D_obs_grid, coherence_grid = np.asarray(D_obs_grid, float), np.asarray(coherence_grid, float)
+    energies = np.empty((D_obs_grid.size, coherence_grid.size), dtype=np.float32)
+    optimal = np.empty(energies.shape + (len(parameters),), dtype=np.float32)
+
+    def energy(values, hamiltonian):
+        bound = circuit.assign_parameters(dict(zip(parameters, values)))
+        return float(np.real(Statevector(bound).expectation_value(hamiltonian)))
+
+    start = time.perf_counter()
+    x0 = np.random.default_rng(seed).uniform(-np.pi, np.pi, len(parameters))
+    for i, D_obs in enumerate(D_obs_grid):
+        order = range(coherence_grid.size) if i % 2 == 0 else reversed(range(coherence_grid.size))
+        for j in order:
+            hamiltonian = verifier_hamiltonian(D_obs, coherence_grid[j], n_qubits)
+            result = minimize(energy, x0, args=(hamiltonian,), method='COBYLA', options={'maxiter': maxiter})
+            energies[i, j], optimal[i, j] = result.fun, result.x
+            x0 = result.x
+
+    table = VQELookupTable(D_obs_grid, coherence_grid, energies, optimal,
+                           {'n_qubits': n_qubits, 'layers': layers, 'maxiter': maxiter,
+                            'build_s': time.perf_counter() - start})
+    if path:
+        table.save(path)
+    return table
+
+
+# --- 2. Lookup ---
+class VQELookupTable:
+    """Optimal VQE energies/parameters on a regular (D_obs, coherence) grid."""
+
+    def __init__(self, D_obs_grid, coherence_grid, energies, parameters, metadata=None):
+        self.D_obs_grid = np.asarray(D_obs_grid, dtype=float)
+        self.coherence_grid = np.asarray(coherence_grid, dtype=float)
+        self.energies = np.asarray(energies)
+        self.parameters = np.asarray(parameters)
+        self.metadata = dict(metadata or {})
+
+    def save(self, path):
+        np.savez_compressed(path, version=TABLE_VERSION, D_obs_grid=self.D_obs_grid,
+                            coherence_grid=self.coherence_grid, energies=self.energies,
+                            parameters=self.parameters, metadata=json.dumps(self.metadata))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if int(data['version']) != TABLE_VERSION:
+                raise ValueError(f"Unsupported VQE table version {int(data['version'])}.")
+            return cls(data['D_obs_grid'], data['coherence_grid'], data['energies'], data['parameters'],
+                       json.loads(str(data['metadata'])))
+
+    @staticmethod
+    def _locate(grid, values):
+        """Cell index and fractional offset of each value (clamped to the grid)."""
+        index = np.clip(np.searchsorted(grid, values, side='right') - 1, 0, grid.size - 2)
+        weight = np.clip((values - grid[index]) / (grid[index + 1] - grid[index]), 0.0, 1.0)
+        return index, weight
+
+    def lookup(self, D_obs, coherence_indicators):
+        """
+        Interpolated VQE optimum for one or many verifications.
+
+        :param D_obs: Scalar or (N,) observer densities.
+        :param coherence_indicators: (7,) or (N, 7) indicators.
+        :return: (energy, parameters at the nearest node, in_grid); outside the grid
+            the query is clamped to the edge and in_grid is False.
+        """
+        D_obs = np.asarray(D_obs, dtype=float)
+        coherence = coherence_level(coherence_indicators)
+        D_obs, coherence = np.broadcast_arrays(D_obs, coherence)
+        in_grid = ((D_obs >= self.D_obs_grid[0]) & (D_obs <= self.D_obs_grid[-1])
+                   & (coherence >= self.coherence_grid[0]) & (coherence <= self.coherence_grid[-1]))
+        i, u = self._locate(self.D_obs_grid, D_obs)
+        j, v = self._locate(self.coherence_grid, coherence)
+        E = self.energies
+        energy = ((1 - u) * (1 - v) * E[i, j] + u * (1 - v) * E[i + 1, j]
+                  + (1 - u) * v * E[i, j + 1] + u * v * E[i + 1, j + 1])
+        parameters = self.parameters[i + np.rint(u).astype(int), j + np.rint(v).astype(int)]
+        return energy, parameters, in_grid
+
+
+if __name__ == "__main__":
+    table_path = 'vqe_table.npz'
+    table = build_vqe_table(table_path, D_obs_grid=np.linspace(0, 1, 6), coherence_grid=np.linspace(0, 1, 6))
+    print(f"🔹 Built {table.energies.size}-node table in {table.metadata['build_s']:.1f} s "
+          f"({os.path.getsize(table_path)} bytes)")
+
+    table = VQELookupTable.load(table_path)
+    start = time.perf_counter()
+    for _ in range(1000):
+        energy, _, in_grid = table.lookup(0.8, [0.9] * 7)
+    print(f"🔹 Lookup {float(energy):.4f} (in grid: {bool(in_grid)}) in "
+          f"{(time.perf_counter() - start) * 1e3:.1f} µs per query")
+    _, _, in_grid = table.lookup(1.5, [1] * 7)
+    print(f"🔹 D_obs = 1.5 inside the grid: {bool(in_grid)}")